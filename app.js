@@ -147,13 +147,25 @@
   }
 
   let TOKEN=0;
+  // manifest.json is tiny and always revalidated; shards are content-addressed, so the browser cache can keep them
+  async function loadData(){
+    try{
+      const m=await fetch(bust("manifest.json"),{cache:"no-store"}); if(!m.ok) throw 0;
+      const shard=(await m.json()).shards.active;
+      const r=await fetch(shard.path); if(!r.ok) throw 0;
+      return await r.json();
+    }catch{}
+    const r=await fetch(bust("data.json"),{cache:"no-store"}); if(!r.ok) throw 0;
+    return await r.json();
+  }
+
   async function render(){
     const my=++TOKEN;
 
     loadVotesLocal();
 
     let data=null;
-    try{ const r=await fetch(bust("data.json"),{cache:"no-store"}); if(!r.ok) throw 0; data=await r.json(); }catch{ data=null; }
+    try{ data=await loadData(); }catch{ data=null; }
     if(my!==TOKEN) return;
 
     const rootOpen=qs("#open-root"), rootApp=qs("#applied-root"), rootOther=qs("#other-root");
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# pipeline.py — scrape -> collect -> merge -> PDF enrich -> QC/learn -> validate in one process
+#   python pipeline.py --mode nightly [--incremental] [--no-collect]
+# Listings are handed from stage to stage in memory and every output is written once, atomically, after
+# validation passes; a failed run leaves the previous data.json, manifest and registries untouched.
+# The archive lives in the SQLite store (tools/store.py): stages only see the active listings and this
+# run's newly archived ones, and data.json (with the full archive) is exported from the store at the end.
+# The per-stage scripts (scraper.py, sources/collector.py, tools/schema_merge.py, qc_and_learn.py,
+# qc_checks.py) still work on their own for debugging.
+import os, sys, json, logging, argparse, pathlib
+from datetime import datetime
+
+ROOT = pathlib.Path(__file__).resolve().parent
+ap = argparse.ArgumentParser()
+ap.add_argument("--mode", default=os.getenv("RUN_MODE","nightly"))
+ap.add_argument("--incremental", action="store_true", default=os.getenv("SCRAPE_INCREMENTAL","")=="1")
+ap.add_argument("--no-collect", action="store_true", help="skip the hybrid collector stage")
+ARGS = ap.parse_args()
+RUN_MODE = (ARGS.mode or "nightly").lower()
+# scraper.py picks its source list and cache TTL from RUN_MODE when it is imported
+os.environ["RUN_MODE"] = RUN_MODE
+
+sys.path.insert(0, str(ROOT)); sys.path.insert(0, str(ROOT/"sources"))
+import scraper, collector, qc_checks
+from qc_and_learn import QCEngine, JLOAD
+from tools import schema_merge, pdf_enrich
+from tools.publish import publish, write_atomic
+from tools.schedule import STATS_PATH
+from tools.store import Store
+from tools.perf import stage
+
+def dump(path, obj):
+    write_atomic(pathlib.Path(path), json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8"))
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+    perf = stage("pipeline")
+    store = Store()
+    with perf.phase("store_sync"):
+        if store.sync("data.json"): logging.info("store rebuilt from data.json")
+
+    with perf.phase("scrape"):
+        scraped = scraper.scrape(ARGS.incremental, store.previous() if ARGS.incremental else None)
+    data = scraped["data"]
+
+    # collector and merge failures only cost this run's extra candidates, as in the step-by-step workflow
+    cands = []
+    if not ARGS.no_collect:
+        try:
+            with perf.phase("collect"): cands = collector.candidates()
+        except Exception as e:
+            logging.warning("collector failed: %s", e)
+    merge_stats = {}
+    with perf.phase("merge"):
+        try:
+            data["jobListings"], _ = schema_merge.merge(data.get("jobListings") or [], cands, merge_stats)
+        except Exception as e:
+            logging.warning("merge failed: %s", e)
+    data.setdefault("sections", {"applied":[],"other":[],"primary":[]})
+    data["transparencyInfo"]["totalListings"] = len(data["jobListings"])
+    if merge_stats: data["transparencyInfo"]["merge"] = merge_stats
+    # deadlines/post counts from PDF notices, so daysLeft and expiry archiving apply to them in QC
+    with perf.phase("pdf"):
+        data["transparencyInfo"]["pdfEnrichment"] = pdf_enrich.enrich(data["jobListings"])
+
+    engine = QCEngine(JLOAD("rules.json", {"captureHints":[], "aggregatorScores":{}}), JLOAD("learn_registry.json", {}), RUN_MODE)
+    with perf.phase("qc"):
+        res = engine.run(data)
+    perf.phases.update({f"qc.{k}": v for k,v in engine.timings.items()})
+    # QC only saw this run's archive additions; the count is the store's archive plus those not yet in it
+    archived_total = store.count("archived") + sum(j.get("id") not in store.archived_ids for j in res["data"]["archivedListings"])
+    res["data"]["transparencyInfo"]["archivedCount"] = res["health"]["archivedCount"] = archived_total
+
+    with perf.phase("validate"):
+        problems = qc_checks.check(res["data"])
+    if problems:
+        print("qc: FAIL"); [print(" -",m) for m in problems]
+        perf.fail(); sys.exit(1)
+
+    with perf.phase("write"):
+        store.commit(res["data"], os.getenv("FETCH_RUN_ID", ""), RUN_MODE)
+        publish(store.export(res["data"]))
+        store.stamp("data.json")
+        dump("rules.json", res["rules"])
+        dump("learn_registry.json", res["learn"])
+        dump("learn.json", {"generatedAt": datetime.utcnow().isoformat()+"Z","runMode": RUN_MODE})
+        dump(STATS_PATH, scraped["stats"])
+        if scraped["changes"] is not None: dump("changes.json", scraped["changes"])
+        dump("health.json", res["health"])
+        # printed by the workflow's "Print merge stats" step
+        dump("tmp/merge_stats.json", merge_stats)
+    print(f"qc: OK (active={len(res['data']['jobListings'])}, archived={archived_total})")
+    store.close()
+
+if __name__=="__main__": main()
@@ -4,8 +4,11 @@
 # - Adds: robust learn_registry guards, dd/mm/yyyy preference, and report-driven deadline overwrite
 # - Adds: non_vacancy pattern learn+filter, without host-wide penalties
 
-import json, pathlib, re, argparse, urllib.parse
+import json, pathlib, re, argparse, urllib.parse, hashlib, time
 from datetime import datetime, timedelta, date
+from tools.publish import publish
+from tools.perf import stage
+from tools.dates import parse as parse_date_any, find_all as find_dates
 
 P = pathlib.Path
 
@@ -17,45 +20,24 @@ def JLOAD(p, d):
     pass
   return d
 
-def JLOADL(p):
-  out=[]
-  if P(p).exists():
-    for line in P(p).read_text(encoding="utf-8").splitlines():
-      line=line.strip()
-      if not line: continue
-      try: out.append(json.loads(line))
-      except: pass
-  return out
+def JTAIL(f, off):
+  """Yield (end_offset, record) for each complete JSONL line of open binary file `f` from byte `off`.
+  A trailing line without newline is only consumed if it already parses (it may still be mid-append)."""
+  f.seek(off)
+  for raw in f:
+    end=off+len(raw); line=raw.strip()
+    if not raw.endswith(b"\n"):
+      try: rec=json.loads(line)
+      except: return
+      yield end, rec; return
+    off=end
+    if not line: continue
+    try: yield end, json.loads(line)
+    except: yield end, None
 
 def JWRITE(p, obj):
   P(p).write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
 
-ap = argparse.ArgumentParser()
-ap.add_argument("--mode", default="nightly")
-RUN_MODE = (ap.parse_args().mode or "nightly").lower()
-
-raw = JLOAD("data.json", {"jobListings":[], "archivedListings":[], "transparencyInfo":{}})
-jobs = list(raw.get("jobListings") or [])
-archived = list(raw.get("archivedListings") or [])
-votes = JLOADL("votes.jsonl")
-reports = JLOADL("reports.jsonl")
-subs = JLOADL("submissions.jsonl")
-rules = JLOAD("rules.json", {"captureHints":[], "aggregatorScores":{}})
-
-# Learning registry (guard all keys)
-learn = JLOAD("learn_registry.json", {})
-if not isinstance(learn, dict): learn={}
-learn.setdefault("byHost", {})
-learn.setdefault("bySlug", {})
-learn.setdefault("patterns", {})   # host -> [ {kind,titleTokens,pathTokens,addedAt} ]
-learn.setdefault("notes", [])
-
-def note(ev):
-  try:
-    learn["notes"] = ([{**ev, "at": datetime.utcnow().isoformat()+"Z"}] + (learn.get("notes") or []))[:50]
-  except:
-    pass
-
 def host(u):
   try: return urllib.parse.urlparse(u or "").netloc.lower()
   except: return ""
@@ -83,17 +65,7 @@ def slugify(text):
   t=re.sub(r"[^a-z0-9]+","-",t).strip("-")
   return t[:80] if t else ""
 
-def parse_date_any(s):
-  if not s or s.strip().upper()=="N/A": return None
-  s=s.strip()
-  # Prefer Worker-normalized dd/mm/yyyy
-  for f in ("%d/%m/%Y","%Y-%m-%d","%d-%m-%Y","%d %B %Y","%d %b %Y"):
-    try: return datetime.strptime(s,f).date()
-    except: pass
-  return None
-
 UPD_TOK = ["corrigendum","extension","extended","addendum","amendment","revised","rectified","notice","last date","reopen","re-open","reopened"]
-DATE_PAT = re.compile(r"(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{1,2}\s+[A-Za-z]{3,9}\s+\d{2,4})")
 def is_update_title(t): return any(k in (t or "").lower() for k in UPD_TOK)
 
 def normalize_pdf_stem(u):
@@ -124,116 +96,13 @@ def parse_posts_from_text(txt):
     except: return None
   return None
 
-# Slug hint helper (conservative)
-def learn_set_slug(slug, **kw):
-  if not slug: return
-  if not isinstance(learn.get("bySlug"), dict): learn["bySlug"]={}
-  rec = learn["bySlug"].setdefault(slug, {})
-  changed=False
-  for k,v in kw.items():
-    if v in (None,""): continue
-    if rec.get(k)!=v:
-      rec[k]=v; changed=True
-  if changed:
-    rec["updatedAt"]=datetime.utcnow().isoformat()+"Z"
-    note({"slug_hint":slug, **kw})
-
-# Pattern helpers
-def patterns_for_host(h):
-  return (learn.get("patterns") or {}).get(h, [])
-
-def mark_non_vacancy_pattern(h, title, url):
-  if not h: return
-  tt = list(dict.fromkeys(title_tokens(title)))[:8]
-  pt = [x for x in path_tokens(url) if len(x)<=40][:6]
-  pat = {"kind":"non_vacancy","titleTokens":tt,"pathTokens":pt,"addedAt":datetime.utcnow().isoformat()+"Z"}
-  learn["patterns"]=learn.get("patterns") or {}
-  arr = learn["patterns"].setdefault(h, [])
-  def same(a,b): return a.get("kind")==b.get("kind") and a.get("titleTokens")==b.get("titleTokens") and a.get("pathTokens")==b.get("pathTokens")
-  if not any(same(p,pat) for p in arr):
-    arr.append(pat); note({"learned":"non_vacancy_pattern","host":h,"titleTokens":tt,"pathTokens":pt})
-
-def matches_non_vacancy_pattern(h, title, url):
-  arr = patterns_for_host(h)
-  if not arr: return False
-  tt = set(title_tokens(title)); pt = set(path_tokens(url))
-  for p in arr:
-    if p.get("kind")!="non_vacancy": continue
-    need_tt = set(p.get("titleTokens",[])); need_pt = set(p.get("pathTokens",[]))
-    if need_pt and not need_pt.issubset(pt): continue
-    if not need_tt or len(tt.intersection(need_tt))>=max(1,len(need_tt)//2 or 1):
-      return True
-  return False
-
-# ---------------- Merge updates into parents (verbatim behavior) ----------------
-parents=[j for j in jobs if not is_update_title(j.get("title"))]
-kept=[]; merged_count=0
-for j in jobs:
-  if not is_update_title(j.get("title")):
-    kept.append(j); continue
-  best=None; score=0.0
-  for p in parents:
-    s=0.0
-    if url_root(j.get("applyLink"))==url_root(p.get("applyLink")): s+=0.45
-    if normalize_pdf_stem(j.get("applyLink")) and normalize_pdf_stem(j.get("applyLink"))==normalize_pdf_stem(p.get("applyLink")): s+=0.35
-    if adv_no(j.get("title")) and adv_no(j.get("title"))==adv_no(p.get("title")): s+=0.25
-    if s>score: score, best = s, p
-  if best and score>=0.6:
-    best.setdefault("updates", []).append({"title": j.get("title"), "link": j.get("applyLink"), "capturedAt": datetime.utcnow().isoformat()+"Z"})
-    # try extend date and posts from update title
-    dates=[m.group(1) for m in DATE_PAT.finditer(j.get("title") or "")]
-    parsed=[parse_date_any(x.replace("-","/")) for x in dates if x]; parsed=[d for d in parsed if d]
-    if parsed:
-      new_deadline=max(parsed)
-      cur=parse_date_any(best.get("deadline"))
-      if not cur or new_deadline>cur:
-        best["deadline"]=new_deadline.strftime("%d/%m/%Y")
-        learn_set_slug(slugify(best.get("title")), lastDate=best["deadline"])
-    pcount = parse_posts_from_text(j.get("title"))
-    if pcount and not best.get("numberOfPosts"):
-      best["numberOfPosts"]=pcount
-      learn_set_slug(slugify(best.get("title")), posts=pcount)
-    merged_count+=1
-  else:
-    j["type"]="UPDATE"; j.setdefault("flags",{})["no_parent_found"]=True; kept.append(j)
-jobs=kept
-
-# ---------------- Submissions -> captureHints + add (verbatim) ----------------
-seen_keys={norm_url(j.get("applyLink")) for j in jobs}
-for s in subs:
-  if s.get("type")!="missing": continue
-  title=(s.get("title") or "").strip()
-  url=norm_url((s.get("url") or "").strip())
-  site=(s.get("officialSite") or "").strip()
-  last=(s.get("lastDate") or s.get("deadline") or "").strip() or "N/A"
-  posts=s.get("posts")
-  if site and site not in rules["captureHints"]: rules["captureHints"].append(site)
-  if not title or not url: continue
-  if url in seen_keys: continue
-  card={
-    "id": f"user_{abs(hash(url))%10**9}",
-    "title": title, "qualificationLevel": "Any graduate", "domicile": "All India",
-    "deadline": last, "applyLink": url, "detailLink": url,
-    "source": "official", "type": "VACANCY",
-    "flags": {"added_from_missing": True, "trusted": True}
-  }
-  try:
-    if isinstance(posts,str) and posts.strip().isdigit(): posts=int(posts.strip())
-    if isinstance(posts,int) and posts>0: card["numberOfPosts"]=posts
-  except: pass
-  jobs.append(card); seen_keys.add(url)
-
-# ---------------- Reports -> corrections + learned patterns ----------------
-report_map = {}
-for r in reports:
-  if r.get("type")!="report": continue
-  jid=(r.get("jobId") or "").strip()
-  if not jid: continue
-  rec=report_map.setdefault(jid, {"reasons": []})
-  rec["reasons"].append((r.get("reasonCode") or "").strip())
-  for k in ("lastDate","eligibility","evidenceUrl","posts"):
-    v=r.get(k)
-    if v: rec[k]=v
+def match_keys(j):
+  return url_root(j.get("applyLink")), normalize_pdf_stem(j.get("applyLink")), adv_no(j.get("title"))
+
+def ck_digest(f, off):
+  f.seek(0); head=f.read(min(off, CK_SPAN))
+  f.seek(max(0, off-CK_SPAN)); tail=f.read(min(off, CK_SPAN))
+  return hashlib.sha1(head+b"|"+tail).hexdigest()
 
 def keep_date(j):
   d=parse_date_any(j.get("deadline"))
@@ -244,101 +113,362 @@ def keep_date(j):
     except: return None
   return None
 
-primary=[]; other=[]; today=date.today()
-
-for j in jobs:
-  jid=j.get("id") or f"user_{abs(hash(j.get('applyLink','')))%10**9}"
-  j["id"]=jid
-  h=host(j.get("applyLink"))
-
-  # Pattern filter with strong-signal bypass
-  if matches_non_vacancy_pattern(h, j.get("title",""), j.get("applyLink","")):
-    if not (j.get("numberOfPosts") and parse_date_any(j.get("deadline"))):
-      j.setdefault("flags",{})["auto_filtered"]="learn_non_vacancy"
-      archived.append(j)
-      continue
-
-  # Apply report-driven corrections (verbatim + lastDate overwrite)
-  if jid in report_map:
-    info=report_map[jid]; reasons=set([x for x in info.get("reasons",[]) if x])
-    s=slugify(j.get("title"))
-    if "wrong_last_date" in reasons and info.get("lastDate"):
-      j["deadline"]=info["lastDate"]; learn_set_slug(s, lastDate=j["deadline"])
-    if "wrong_eligibility" in reasons and info.get("eligibility"):
-      j["qualificationLevel"]=info["eligibility"]; learn_set_slug(s, eligibility=j["qualificationLevel"])
-    if "bad_link" in reasons and info.get("evidenceUrl"):
-      j["applyLink"]=info["evidenceUrl"]; j["detailLink"]=info["evidenceUrl"]; j.setdefault("flags",{})["fixed_link"]=True
-      learn_set_slug(s, fixedLink=j["applyLink"])
-    if "duplicate" in reasons or "not_vacancy" in reasons or "last_date_over" in reasons:
-      j.setdefault("flags",{})["removed_reason"]="reported_"+("_".join(sorted(reasons)))
-      if "not_vacancy" in reasons:
-        mark_non_vacancy_pattern(h, j.get("title",""), j.get("applyLink",""))
-      archived.append(j); continue
-    if info.get("posts") and not j.get("numberOfPosts"):
-      try:
-        p=int(info["posts"])
-        if p>0:
-          j["numberOfPosts"]=p; learn_set_slug(s, posts=p)
-      except: pass
-
-  # Days left + posts fallback
-  last=keep_date(j)
-  if last is not None: j["daysLeft"]=(last - today).days
-  if not j.get("numberOfPosts"):
-    c=parse_posts_from_text(j.get("title")) or j.get("flags",{}).get("posts")
-    if c: j["numberOfPosts"]=c
-
-  # Sectioning and 7-day archive (unchanged)
-  if last and last < today:
-    if (today - last).days > 7:
-      j.setdefault("flags",{})["auto_archived"]="expired_7d"; archived.append(j)
-    else:
-      other.append(j)
-  else:
-    primary.append(j)
-
-# ---------------- Transparency and outputs (unchanged) ----------------
 def host_only(u):
   try: return urllib.parse.urlparse(u or "").netloc.lower()
   except: return ""
-sources=set()
-for h in (rules.get("captureHints") or []):
-  try: sources.add(urllib.parse.urlparse(h).netloc.lower())
-  except: pass
-seen_hosts={}
-for j in primary+other:
-  seen_hosts.setdefault(host_only(j.get("applyLink")),0); seen_hosts[host_only(j.get("applyLink"))]+=1
-sources_status=[{"host":h,"items":seen_hosts.get(h,0)} for h in sorted(sources)]
-
-transp = raw.get("transparencyInfo") or {}
-transp.update({
-  "schemaVersion":"1.7",
-  "runMode": RUN_MODE,
-  "lastUpdated": datetime.utcnow().isoformat()+"Z",
-  "mergedUpdates": merged_count,
-  "totalListings": len(primary)+len(other),
-  "sourcesByStatus": sources_status,
-  "archivedCount": len(archived),
-  "learning": {
-    "hosts": len(learn.get("byHost") or {}),
-    "slugs": len(learn.get("bySlug") or {}),
-    "patterns": { h: len(v) for h,v in (learn.get("patterns") or {}).items() }
-  }
-})
-
-out = {
-  "jobListings": primary+other,
-  "archivedListings": archived,
-  "sections": {
-    "applied": [],
-    "other": [j["id"] for j in other],
-    "primary": [j["id"] for j in primary]
-  },
-  "transparencyInfo": transp
-}
-
-JWRITE("data.json", out)
-JWRITE("rules.json", rules)
-JWRITE("learn_registry.json", learn)
-JWRITE("learn.json", {"generatedAt": datetime.utcnow().isoformat()+"Z","runMode": RUN_MODE})
-JWRITE("health.json", {"ok": True, **transp})
+
+CK_SPAN = 4096
+FEEDBACK_FILES = {"votes": "votes.jsonl", "reports": "reports.jsonl", "submissions": "submissions.jsonl"}
+
+class QCEngine:
+  """QC + learn over explicit inputs. `rules` and `learn` (the registry) are updated in place;
+  run() takes the data document and feedback, and returns the outputs without writing anything."""
+
+  def __init__(self, rules=None, learn=None, mode="nightly"):
+    self.rules = rules if isinstance(rules, dict) else {"captureHints":[], "aggregatorScores":{}}
+    self.rules.setdefault("captureHints", [])
+    # Learning registry (guard all keys)
+    learn = learn if isinstance(learn, dict) else {}
+    learn.setdefault("byHost", {})
+    learn.setdefault("bySlug", {})
+    learn.setdefault("patterns", {})   # host -> [ {kind,titleTokens,pathTokens,addedAt} ]
+    learn.setdefault("notes", [])
+    learn.setdefault("ingest", {})     # file -> {offset, digest, lines}: feedback already folded in
+    learn.setdefault("feedback", {})   # persisted aggregates of votes/reports/submissions
+    for k in ("reports","missing","votes"):
+      if not isinstance(learn["feedback"].get(k), dict): learn["feedback"][k]={}
+    self.learn = learn
+    self.mode = (mode or "nightly").lower()
+    # Learned patterns compiled per host into an inverted index: title token -> pattern ids.
+    # A job only counts token hits against the patterns its own tokens point at.
+    self.pattern_cache = {}
+    self.timings = {}
+
+  @property
+  def feed(self): return self.learn["feedback"]
+
+  def note(self, ev):
+    try:
+      self.learn["notes"] = ([{**ev, "at": datetime.utcnow().isoformat()+"Z"}] + (self.learn.get("notes") or []))[:50]
+    except:
+      pass
+
+  # Slug hint helper (conservative)
+  def learn_set_slug(self, slug, **kw):
+    if not slug: return
+    learn = self.learn
+    if not isinstance(learn.get("bySlug"), dict): learn["bySlug"]={}
+    rec = learn["bySlug"].setdefault(slug, {})
+    changed=False
+    for k,v in kw.items():
+      if v in (None,""): continue
+      if rec.get(k)!=v:
+        rec[k]=v; changed=True
+    if changed:
+      rec["updatedAt"]=datetime.utcnow().isoformat()+"Z"
+      self.note({"slug_hint":slug, **kw})
+
+  # Pattern helpers
+  def patterns_for_host(self, h):
+    return (self.learn.get("patterns") or {}).get(h, [])
+
+  def mark_non_vacancy_pattern(self, h, title, url):
+    if not h: return
+    tt = list(dict.fromkeys(title_tokens(title)))[:8]
+    pt = [x for x in path_tokens(url) if len(x)<=40][:6]
+    pat = {"kind":"non_vacancy","titleTokens":tt,"pathTokens":pt,"addedAt":datetime.utcnow().isoformat()+"Z"}
+    self.learn["patterns"]=self.learn.get("patterns") or {}
+    arr = self.learn["patterns"].setdefault(h, [])
+    def same(a,b): return a.get("kind")==b.get("kind") and a.get("titleTokens")==b.get("titleTokens") and a.get("pathTokens")==b.get("pathTokens")
+    if not any(same(p,pat) for p in arr):
+      arr.append(pat); self.pattern_cache.pop(h, None)
+      self.note({"learned":"non_vacancy_pattern","host":h,"titleTokens":tt,"pathTokens":pt})
+
+  def compile_patterns(self, h):
+    idx = {"need": [], "byToken": {}, "noTitle": []}
+    for p in self.patterns_for_host(h):
+      if p.get("kind")!="non_vacancy": continue
+      need_tt = set(p.get("titleTokens",[])); need_pt = frozenset(p.get("pathTokens",[]))
+      i = len(idx["need"]); idx["need"].append((need_pt, max(1,len(need_tt)//2 or 1)))
+      if not need_tt: idx["noTitle"].append(i)
+      for t in need_tt: idx["byToken"].setdefault(t, []).append(i)
+    return idx
+
+  def pattern_index(self, h):
+    idx = self.pattern_cache.get(h)
+    if idx is None: idx = self.pattern_cache[h] = self.compile_patterns(h)
+    return idx
+
+  def matches_non_vacancy_pattern(self, h, title, url):
+    idx = self.pattern_index(h)
+    if not idx["need"]: return False
+    hits = {}
+    for t in set(title_tokens(title)):
+      for i in idx["byToken"].get(t, ()): hits[i] = hits.get(i,0)+1
+    cand = [i for i,c in hits.items() if c>=idx["need"][i][1]] + idx["noTitle"]
+    pt = None
+    for i in cand:
+      need_pt = idx["need"][i][0]
+      if not need_pt: return True
+      if pt is None: pt = set(path_tokens(url))
+      if need_pt.issubset(pt): return True
+    return False
+
+  # ---------------- Merge updates into parents (verbatim behavior) ----------------
+  def merge_updates(self, jobs):
+    parents=[j for j in jobs if not is_update_title(j.get("title"))]
+    # Parent keys are computed once. Reaching the 0.6 threshold needs two of the three signals and every
+    # such pair includes the pdf stem or the advt no, so those two indexes yield all viable candidates.
+    pkeys=[match_keys(p) for p in parents]
+    by_stem={}; by_adv={}
+    for i,(_,st,ad) in enumerate(pkeys):
+      if st: by_stem.setdefault(st, []).append(i)
+      if ad: by_adv.setdefault(ad, []).append(i)
+    kept=[]; merged_count=0
+    for j in jobs:
+      if not is_update_title(j.get("title")):
+        kept.append(j); continue
+      best=None; score=0.0
+      root, stem, adv = match_keys(j)
+      cand=set(by_stem.get(stem, ()) if stem else ()) | set(by_adv.get(adv, ()) if adv else ())
+      for i in sorted(cand):
+        proot, pstem, padv = pkeys[i]; s=0.0
+        if root==proot: s+=0.45
+        if stem and stem==pstem: s+=0.35
+        if adv and adv==padv: s+=0.25
+        if s>score: score, best = s, parents[i]
+      if best and score>=0.6:
+        ups = best.setdefault("updates", [])
+        # parents carried over from the previous snapshot may already hold this update
+        if not any(u.get("link")==j.get("applyLink") and u.get("title")==j.get("title") for u in ups):
+          ups.append({"id": j.get("id"), "title": j.get("title"), "link": j.get("applyLink"), "capturedAt": datetime.utcnow().isoformat()+"Z"})
+        # try extend date and posts from update title
+        parsed=find_dates(j.get("title") or "")
+        if parsed:
+          new_deadline=max(parsed)
+          cur=parse_date_any(best.get("deadline"))
+          if not cur or new_deadline>cur:
+            best["deadline"]=new_deadline.strftime("%d/%m/%Y")
+            self.learn_set_slug(slugify(best.get("title")), lastDate=best["deadline"])
+        pcount = parse_posts_from_text(j.get("title"))
+        if pcount and not best.get("numberOfPosts"):
+          best["numberOfPosts"]=pcount
+          self.learn_set_slug(slugify(best.get("title")), posts=pcount)
+        merged_count+=1
+      else:
+        j["type"]="UPDATE"; j.setdefault("flags",{})["no_parent_found"]=True; kept.append(j)
+    return kept, merged_count
+
+  # ---------------- Feedback ingestion (incremental) ----------------
+  # votes/reports/submissions are append-only logs. learn["ingest"] remembers how far each file has
+  # been folded into learn["feedback"], so a run only parses lines appended since the last one. The
+  # digest covers the bytes around the checkpoint; if the consumed prefix changed, that file's
+  # aggregate is rebuilt from the start.
+  def ingest(self, p, fold, reset):
+    ck = self.learn["ingest"].setdefault(p, {})
+    if not P(p).exists(): return 0
+    n=0
+    with open(p, "rb") as f:
+      size=f.seek(0, 2); off=ck.get("offset", 0)
+      if off>size or (off and ck_digest(f, off)!=ck.get("digest")):
+        reset(); off=0; ck["lines"]=0
+      for end, rec in JTAIL(f, off):
+        if isinstance(rec, dict): fold(rec); n+=1
+        off=end
+      ck.update({"offset": off, "digest": ck_digest(f, off), "lines": ck.get("lines", 0)+n})
+    return n
+
+  def fold_vote(self, v):
+    if v.get("type")!="vote": return
+    jid=(v.get("jobId") or "").strip(); kind=(v.get("vote") or "").strip()
+    if not jid or kind not in ("right","wrong","undo_right","undo_wrong"): return
+    rec=self.feed["votes"].setdefault(jid, {"right": 0, "wrong": 0})
+    k=kind.replace("undo_","")
+    rec[k]=max(0, rec.get(k, 0)+(-1 if kind.startswith("undo_") else 1))
+
+  def fold_report(self, r):
+    if r.get("type")!="report": return
+    jid=(r.get("jobId") or "").strip()
+    if not jid: return
+    rec=self.feed["reports"].setdefault(jid, {"reasons": []})
+    code=(r.get("reasonCode") or "").strip()
+    if code and code not in rec["reasons"]: rec["reasons"].append(code)
+    for k in ("lastDate","eligibility","evidenceUrl","posts"):
+      v=r.get(k)
+      if v: rec[k]=v
+
+  def fold_missing(self, s):
+    if s.get("type")!="missing": return
+    site=(s.get("officialSite") or "").strip()
+    if site and site not in self.rules["captureHints"]: self.rules["captureHints"].append(site)
+    title=(s.get("title") or "").strip()
+    url=norm_url((s.get("url") or "").strip())
+    if not title or not url or url in self.feed["missing"]: return
+    self.feed["missing"][url]={"title": title, "lastDate": (s.get("lastDate") or s.get("deadline") or "").strip() or "N/A", "posts": s.get("posts")}
+
+  def ingest_feedback(self, feedback=None):
+    """Fold feedback into the registry. Each kind (votes/reports/submissions) is either a JSONL path,
+    read incrementally from its checkpoint, or an iterable of event dicts folded as given."""
+    feedback = FEEDBACK_FILES if feedback is None else feedback
+    folds = {"votes": (self.fold_vote, "votes"), "reports": (self.fold_report, "reports"), "submissions": (self.fold_missing, "missing")}
+    counts = {}
+    for kind,(fold,agg) in folds.items():
+      src = feedback.get(kind)
+      if src is None: counts[kind]=0
+      elif isinstance(src, str): counts[kind]=self.ingest(src, fold, lambda agg=agg: self.feed.update({agg: {}}))
+      else:
+        n=0
+        for ev in src:
+          if isinstance(ev, dict): fold(ev); n+=1
+        counts[kind]=n
+    return counts
+
+  # ---------------- Submissions -> add (from the persisted aggregate) ----------------
+  def add_submissions(self, jobs):
+    seen_keys={norm_url(j.get("applyLink")) for j in jobs}
+    for url, s in self.feed["missing"].items():
+      title=s["title"]; last=s.get("lastDate") or "N/A"; posts=s.get("posts")
+      if url in seen_keys: continue
+      card={
+        "id": f"user_{abs(hash(url))%10**9}",
+        "title": title, "qualificationLevel": "Any graduate", "domicile": "All India",
+        "deadline": last, "applyLink": url, "detailLink": url,
+        "source": "official", "type": "VACANCY",
+        "flags": {"added_from_missing": True, "trusted": True}
+      }
+      try:
+        if isinstance(posts,str) and posts.strip().isdigit(): posts=int(posts.strip())
+        if isinstance(posts,int) and posts>0: card["numberOfPosts"]=posts
+      except: pass
+      jobs.append(card); seen_keys.add(url)
+    return jobs
+
+  # ---------------- Reports -> corrections + learned patterns ----------------
+  def apply_reports(self, jobs, archived, today=None):
+    report_map = self.feed["reports"]
+    primary=[]; other=[]; today=today or date.today()
+    for j in jobs:
+      jid=j.get("id") or f"user_{abs(hash(j.get('applyLink','')))%10**9}"
+      j["id"]=jid
+      h=host(j.get("applyLink"))
+
+      # Pattern filter with strong-signal bypass
+      if self.matches_non_vacancy_pattern(h, j.get("title",""), j.get("applyLink","")):
+        if not (j.get("numberOfPosts") and parse_date_any(j.get("deadline"))):
+          j.setdefault("flags",{})["auto_filtered"]="learn_non_vacancy"
+          archived.append(j)
+          continue
+
+      # Apply report-driven corrections (verbatim + lastDate overwrite)
+      if jid in report_map:
+        info=report_map[jid]; reasons=set([x for x in info.get("reasons",[]) if x])
+        s=slugify(j.get("title"))
+        if "wrong_last_date" in reasons and info.get("lastDate"):
+          j["deadline"]=info["lastDate"]; self.learn_set_slug(s, lastDate=j["deadline"])
+        if "wrong_eligibility" in reasons and info.get("eligibility"):
+          j["qualificationLevel"]=info["eligibility"]; self.learn_set_slug(s, eligibility=j["qualificationLevel"])
+        if "bad_link" in reasons and info.get("evidenceUrl"):
+          j["applyLink"]=info["evidenceUrl"]; j["detailLink"]=info["evidenceUrl"]; j.setdefault("flags",{})["fixed_link"]=True
+          self.learn_set_slug(s, fixedLink=j["applyLink"])
+        if "duplicate" in reasons or "not_vacancy" in reasons or "last_date_over" in reasons:
+          j.setdefault("flags",{})["removed_reason"]="reported_"+("_".join(sorted(reasons)))
+          if "not_vacancy" in reasons:
+            self.mark_non_vacancy_pattern(h, j.get("title",""), j.get("applyLink",""))
+          archived.append(j); continue
+        if info.get("posts") and not j.get("numberOfPosts"):
+          try:
+            p=int(info["posts"])
+            if p>0:
+              j["numberOfPosts"]=p; self.learn_set_slug(s, posts=p)
+          except: pass
+
+      # Days left + posts fallback
+      last=keep_date(j)
+      if last is not None: j["daysLeft"]=(last - today).days
+      if not j.get("numberOfPosts"):
+        c=parse_posts_from_text(j.get("title")) or j.get("flags",{}).get("posts")
+        if c: j["numberOfPosts"]=c
+
+      # Sectioning and 7-day archive (unchanged)
+      if last and last < today:
+        if (today - last).days > 7:
+          j.setdefault("flags",{})["auto_archived"]="expired_7d"; archived.append(j)
+        else:
+          other.append(j)
+      else:
+        primary.append(j)
+    return primary, other, archived
+
+  # ---------------- Transparency and outputs (unchanged) ----------------
+  def transparency(self, base, primary, other, archived, merged_count, ingested):
+    learn = self.learn
+    sources=set()
+    for h in (self.rules.get("captureHints") or []):
+      try: sources.add(urllib.parse.urlparse(h).netloc.lower())
+      except: pass
+    seen_hosts={}
+    for j in primary+other:
+      seen_hosts.setdefault(host_only(j.get("applyLink")),0); seen_hosts[host_only(j.get("applyLink"))]+=1
+    sources_status=[{"host":h,"items":seen_hosts.get(h,0)} for h in sorted(sources)]
+    transp = base or {}
+    transp.update({
+      "schemaVersion":"1.7",
+      "runMode": self.mode,
+      "lastUpdated": datetime.utcnow().isoformat()+"Z",
+      "mergedUpdates": merged_count,
+      "totalListings": len(primary)+len(other),
+      "sourcesByStatus": sources_status,
+      "archivedCount": len(archived),
+      "feedbackIngested": ingested,
+      "learning": {
+        "hosts": len(learn.get("byHost") or {}),
+        "slugs": len(learn.get("bySlug") or {}),
+        "patterns": { h: len(v) for h,v in (learn.get("patterns") or {}).items() }
+      }
+    })
+    return transp
+
+  def timed(self, name, fn, *a):
+    t=time.perf_counter()
+    try: return fn(*a)
+    finally: self.timings[name]=round(self.timings.get(name, 0)+time.perf_counter()-t, 3)
+
+  def run(self, data, feedback=None):
+    """One QC pass over `data` (the data.json document). Returns {"data", "rules", "learn", "health"};
+    the listing dicts in `data` are updated in place."""
+    jobs = list(data.get("jobListings") or [])
+    archived = list(data.get("archivedListings") or [])
+    jobs, merged_count = self.timed("merge_updates", self.merge_updates, jobs)
+    ingested = self.timed("ingest_feedback", self.ingest_feedback, feedback)
+    jobs = self.timed("add_submissions", self.add_submissions, jobs)
+    primary, other, archived = self.timed("apply_reports", self.apply_reports, jobs, archived)
+    transp = self.transparency(data.get("transparencyInfo"), primary, other, archived, merged_count, ingested)
+    out = {
+      "jobListings": primary+other,
+      "archivedListings": archived,
+      "sections": {
+        "applied": [],
+        "other": [j["id"] for j in other],
+        "primary": [j["id"] for j in primary]
+      },
+      "transparencyInfo": transp
+    }
+    return {"data": out, "rules": self.rules, "learn": self.learn, "health": {"ok": True, **transp}}
+
+def main(argv=None):
+  ap = argparse.ArgumentParser()
+  ap.add_argument("--mode", default="nightly")
+  mode = (ap.parse_args(argv).mode or "nightly").lower()
+  perf = stage("qc_and_learn")
+  raw = JLOAD("data.json", {"jobListings":[], "archivedListings":[], "transparencyInfo":{}})
+  engine = QCEngine(JLOAD("rules.json", {"captureHints":[], "aggregatorScores":{}}), JLOAD("learn_registry.json", {}), mode)
+  res = engine.run(raw)
+  perf.phases.update(engine.timings)
+  publish(res["data"])
+  JWRITE("rules.json", res["rules"])
+  JWRITE("learn_registry.json", res["learn"])
+  JWRITE("learn.json", {"generatedAt": datetime.utcnow().isoformat()+"Z","runMode": mode})
+  JWRITE("health.json", res["health"])
+
+if __name__ == "__main__":
+  main()
@@ -1,7 +1,9 @@
 # qc_checks.py — validate final data.json (schema v1.3 compatible)
 import json, sys, pathlib
 from urllib.parse import urlparse
-from datetime import datetime, date
+from datetime import date
+from tools.perf import stage, fail
+from tools.dates import parse as parse_date_any
 
 def is_http_url(u):
   if not u: return False
@@ -9,22 +11,8 @@ def is_http_url(u):
     p=urlparse(u); return p.scheme in ("http","https") and bool(p.netloc)
   except: return False
 
-def parse_date_any(s):
-  if not s or s.strip().upper()=="N/A": return None
-  s=s.strip()
-  for f in ("%Y-%m-%d","%d/%m/%Y","%d-%m-%Y","%d %B %Y","%d %b %Y"):
-    try: return datetime.strptime(s,f).date()
-    except: pass
-  return None
-
-def main():
-  p = pathlib.Path("data.json")
-  if not p.exists(): print("qc: data.json missing"); sys.exit(2)
-  try:
-    data=json.loads(p.read_text(encoding="utf-8"))
-  except Exception as e:
-    print(f"qc: invalid JSON: {e}"); sys.exit(2)
-
+def check(data):
+  """List of problems found in the data.json document `data` (empty when it is valid)."""
   listings=data.get("jobListings", []); archived=data.get("archivedListings", []); tinfo=data.get("transparencyInfo", {})
   problems=[]; seen=set(); today=date.today()
 
@@ -56,8 +44,19 @@ def main():
   if isinstance(tinfo.get("totalListings"),int) and tinfo["totalListings"]!=len(listings):
     problems.append("transparencyInfo.totalListings mismatch")
 
+  return problems
+
+def main():
+  stage("qc_checks")
+  p = pathlib.Path("data.json")
+  if not p.exists(): print("qc: data.json missing"); fail(); sys.exit(2)
+  try:
+    data=json.loads(p.read_text(encoding="utf-8"))
+  except Exception as e:
+    print(f"qc: invalid JSON: {e}"); fail(); sys.exit(2)
+  problems=check(data); listings=data.get("jobListings", []); archived=data.get("archivedListings", [])
   if problems:
-    print("qc: FAIL"); [print(" -",m) for m in problems]; sys.exit(1)
+    print("qc: FAIL"); [print(" -",m) for m in problems]; fail(); sys.exit(1)
   print(f"qc: OK (active={len(listings)}, archived={len(archived)})"); sys.exit(0)
 
 if __name__=="__main__": main()
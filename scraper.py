@@ -1,29 +1,36 @@
 #!/usr/bin/env python3
 # scraper.py — official-first + reopened detector + aggregator tie-breaks (keeps original two at top)
-import requests
 from bs4 import BeautifulSoup
-import json, logging, re, os, time, argparse, hashlib, pathlib
+try:
+    import lxml.html as LH
+except Exception:
+    LH = None
+import json, logging, re, os, time, argparse, hashlib, asyncio, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
+from tools.eligibility import classify, excluded, TERMS_VERSION
+from tools.httpclient import cached_get, put, CACHE, failure_counts
+from tools.schedule import load_stats, save_stats, record, plan
+from tools.neardup import collapse
+from tools.frontier import Frontier, PAGES_PER_HOST
+from tools.perf import stage, phase
 
 ap = argparse.ArgumentParser()
 ap.add_argument("--mode", default=os.getenv("RUN_MODE","nightly"))
-RUN_MODE = (ap.parse_args().mode or "nightly").lower()
+ap.add_argument("--concurrency", type=int, default=int(os.getenv("FETCH_CONCURRENCY","8")), help="max requests in flight")
+ap.add_argument("--per-host", type=int, default=int(os.getenv("FETCH_PER_HOST","2")), help="max requests in flight per host")
+ap.add_argument("--incremental", action="store_true", default=os.getenv("SCRAPE_INCREMENTAL","")=="1", help="diff against the previous data.json and write changes.json")
+ap.add_argument("--parse-workers", type=int, default=int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1))), help="processes for HTML parsing (1 = inline)")
+ap.add_argument("--host-delay", type=float, default=float(os.getenv("FETCH_HOST_DELAY","0.8")), help="min seconds between request starts on one host")
+ap.add_argument("--crawl-pages", type=int, default=PAGES_PER_HOST, help="extra pages (pagination, view-all) followed per host (0 = landing pages only)")
+# Importing this module (benchmarks, other stages) must not consume the caller's argv
+ARGS = ap.parse_args() if __name__=="__main__" else ap.parse_args([])
+RUN_MODE = (ARGS.mode or "nightly").lower()
 IS_LIGHT = RUN_MODE == "light"
 
-CACHE = pathlib.Path(".cache"); CACHE.mkdir(exist_ok=True)
-def ck(u): return CACHE / (hashlib.sha1(u.encode()).hexdigest()+".html")
-def get(u, ttl=0, timeout=20):
-    f = ck(u)
-    if ttl>0 and f.exists() and time.time()-f.stat().st_mtime < ttl:
-        return f.read_bytes()
-    try:
-        r = requests.get(u, headers={"User-Agent":"Mozilla/5.0"}, timeout=timeout)
-        r.raise_for_status()
-        f.write_bytes(r.content)
-        return r.content
-    except Exception:
-        return b""
+# Page cache (.cache) and conditional revalidation live in tools/httpclient, shared with the collector
+get = cached_get
 
 TTL = 0 if RUN_MODE=="nightly" else (6*3600 if RUN_MODE=="light" else 72*3600)
 
@@ -45,27 +52,11 @@ BASE = [
 SEEDS = [{"name":f"hint{i+1}", "url":u, "parser":"dispatch_seed"} for i,u in enumerate(HINTS[:100])]
 SOURCES = SEEDS if IS_LIGHT else (SEEDS + BASE)
 
-TEACHER_TERMS = {"teacher","tgt","pgt","prt","faculty","lecturer","assistant professor","professor","b.ed","ctet","tet "}
-TECH_TERMS = {"b.tech","btech","b.e","m.tech","m.e","mca","bca","developer","architect","analyst","devops","cloud","ml","ai","research"}
-PG_TERMS = {"mba","pg ","post graduate","postgraduate","phd","m.phil","mcom","m.com","ma ","m.a","msc","m.sc"}
-REOPEN_TOK = re.compile(r"\b(re-?open|re-?opened|reopening|corrigendum|extension|extended|last\s*date|addendum|amendment)\b", re.I)
-
 def clean(s): return re.sub(r"\s+"," ", (s or "").strip())
-def education_band(text):
-    t=(text or "").lower()
-    if any(k in t for k in ["10th","matric","ssc "]): return "10th pass"
-    if any(k in t for k in ["12th","intermediate","hsc"]): return "12th pass"
-    if "any graduate" in t or "any degree" in t or "graduate" in t: return "Any graduate"
-    return "N/A"
+def education_band(text): return classify(text).band
 def disallowed(text):
-    t=(text or "").lower()
-    if any(k in t for k in TEACHER_TERMS): return True
-    # allow “assistant” generic posts if qualification band fits
-    if any(k in t for k in TECH_TERMS|PG_TERMS):
-        if ("graduate" in t or "12th" in t or "10th") and "only" not in t:
-            return False
-        return True
-    return False
+    # allow “assistant” generic posts if qualification band fits (policy shared via tools/eligibility)
+    return excluded(classify(text))
 def stable_id(url, title):
     p=urlparse(url or "")
     return "src_" + hashlib.sha1((f"{p.netloc}{p.path}|{title or ''}".lower()).encode()).hexdigest()[:16]
@@ -75,9 +66,10 @@ def build_job(source, base, title, href):
     if not title: return None
     url = href if href and href.startswith("http") else urljoin(base, href or "")
     if not url: return None
-    if disallowed(title): return None
-    edu=education_band(title)
+    c=classify(title)
+    edu=c.band
     if edu not in {"10th pass","12th pass","Any graduate"}: return None
+    if excluded(c): return None
     j = {
         "id": stable_id(url, title),
         "title": title,
@@ -87,38 +79,46 @@ def build_job(source, base, title, href):
         "qualificationLevel": edu,
         "domicile": "All India",
         "source": "official" if source.startswith("hint") else "aggregator",
-        "type": "UPDATE" if REOPEN_TOK.search(title) else "VACANCY",
+        "type": "UPDATE" if c.update else "VACANCY",
         "extractedAt": datetime.utcnow().isoformat()+"Z",
         "meta": {"sourceUrl": base, "sourceSite": source}
     }
     return j
 
 def allow_link_text(t, h):
-    tl=t.lower(); hl=(h or "").lower()
     # allow vacancies and reopened/extension notices
-    if any(x in tl for x in ["recruit","vacan","notific","apply","advert","employment","assistant","officer","constable","clerk"]): return True
-    if REOPEN_TOK.search(tl) or REOPEN_TOK.search(hl): return True
-    return False
+    c=classify(t)
+    return c.link or c.update or bool(h and classify(h).update)
 
-def parse_generic(content, source, base):
-    soup=BeautifulSoup(content,"html.parser"); out=[]
-    for a in soup.select("table a[href], main a[href], .entry-content a[href], a[href]"):
-        t=clean(a.get_text()); h=a.get("href","")
-        if not t or not h: continue
-        if not allow_link_text(t,h): continue
+def iter_anchors(content):
+    """Yield (text, href) for every <a href> in document order, visiting each anchor once."""
+    doc=None
+    if LH is not None:
+        try: doc=LH.document_fromstring(content)
+        except Exception: doc=None
+    if doc is not None:
+        for a in doc.iter("a"):
+            h=a.get("href")
+            if h: yield a.text_content(), h
+        return
+    for a in BeautifulSoup(content,"html.parser").find_all("a", href=True):
+        yield a.get_text(), a["href"]
+
+def extract_links(content, source, base):
+    out=[]
+    for t,h in iter_anchors(content):
+        # one classifier scan per title (memoized) gates everything else
+        t=clean(t)
+        if not t or not allow_link_text(t,h): continue
         j=build_job(source, base, t, h)
         if j: out.append(j)
     return out
 
+def parse_generic(content, source, base):
+    return extract_links(content, source, base)
+
 def parse_official_like(content, source, base):
-    soup=BeautifulSoup(content,"html.parser"); out=[]
-    for a in soup.select('a[href]'):
-        t=clean(a.get_text()); h=a.get("href","")
-        if not t or not h: continue
-        if not allow_link_text(t,h): continue
-        j=build_job(source, base, t, h)
-        if j: out.append(j)
-    return out
+    return extract_links(content, source, base)
 
 def dispatch_seed(content, source, base):
     host=urlparse(base).netloc.lower()
@@ -127,51 +127,249 @@ def dispatch_seed(content, source, base):
 
 PARSERS={"parse_generic":parse_generic,"dispatch_seed":dispatch_seed}
 
-def fetch_and_parse(src):
-    html = get(src["url"], ttl=TTL, timeout=20)
-    if not html: return []
+# Parser-output memo: one entry per (source, parser, page URL) holding the jobs extracted from the
+# last body seen. Bump PARSE_VERSION whenever parsing/filtering logic changes. Entries not used for
+# MEMO_KEEP (crawled pages no longer linked, removed sources) are pruned after each scrape.
+PARSE_VERSION = "3"
+RULES_VERSION = hashlib.sha1(f"{PARSE_VERSION}|{TERMS_VERSION}".encode()).hexdigest()[:12]
+MEMO = CACHE / "parsed"
+MEMO_KEEP = 45*86400
+def memo_path(src): return MEMO / (hashlib.sha1(f"{src['name']}|{src['parser']}|{src['url']}".encode()).hexdigest()+".json")
+def memo_key(html): return hashlib.sha1(html).hexdigest()+"|"+RULES_VERSION
+
+def memo_get(src, html):
+    p=memo_path(src)
+    try: rec=json.loads(p.read_text(encoding="utf-8"))
+    except Exception: return None
+    if rec.get("key")!=memo_key(html): return None
+    # mtime is the last use, which prune_memo ages out
+    try: p.touch()
+    except OSError: pass
+    now=datetime.utcnow().isoformat()+"Z"
+    jobs=rec.get("jobs") or []
+    for j in jobs: j["extractedAt"]=now
+    return jobs
+
+def memo_put(src, html, jobs):
+    try: put(memo_path(src), json.dumps({"key":memo_key(html), "jobs":jobs}, ensure_ascii=False).encode("utf-8"))
+    except Exception: pass
+
+def prune_memo(now=None):
+    """Drop memo entries unused for MEMO_KEEP; returns the number removed."""
+    cutoff=(now or time.time())-MEMO_KEEP; n=0
+    try: entries=list(os.scandir(MEMO))
+    except OSError: return 0
+    for e in entries:
+        try:
+            if e.stat().st_mtime<cutoff: os.unlink(e.path); n+=1
+        except OSError: pass
+    return n
+
+def run_parser(src, html):
+    """Parser call without the memo; module-level so a ProcessPoolExecutor can run it."""
     fn = PARSERS.get(src["parser"])
     if not fn: return []
     try: return fn(html, src["name"], src["url"])
     except Exception: return []
 
+def parse_fetched(src, html):
+    if not html or src["parser"] not in PARSERS: return []
+    hit = memo_get(src, html)
+    if hit is not None: return hit
+    jobs = run_parser(src, html)
+    memo_put(src, html, jobs)
+    return jobs
+
+# Bodies above this size are parsed in the process pool; small official pages stay inline where
+# pickling and IPC would cost more than the parse itself.
+POOL_MIN_BYTES = 64*1024
+async def parse_async(src, html, pool=None):
+    if pool is None or len(html or b"")<POOL_MIN_BYTES: return parse_fetched(src, html)
+    if src["parser"] not in PARSERS: return []
+    hit = memo_get(src, html)
+    if hit is not None: return hit
+    jobs = await asyncio.get_running_loop().run_in_executor(pool, run_parser, src, html)
+    memo_put(src, html, jobs)
+    return jobs
+
+def fetch_and_parse(src):
+    return parse_fetched(src, get(src["url"], ttl=TTL, timeout=20))
+
+# ---------------- Concurrent fetch engine ----------------
+# Bounded pool of in-flight requests; politeness is per host (concurrency cap plus a
+# minimum spacing between request starts) instead of a global sleep between sources.
+class HostGate:
+    def __init__(self, limit, delay):
+        self.sem=asyncio.Semaphore(max(1,limit)); self.delay=delay; self.next_at=0.0
+    async def __aenter__(self):
+        await self.sem.acquire()
+        now=asyncio.get_running_loop().time()
+        wait=self.next_at-now
+        self.next_at=max(now, self.next_at)+self.delay
+        if wait>0: await asyncio.sleep(wait)
+    async def __aexit__(self, *exc):
+        self.sem.release()
+
+async def fetch_all(sources, on_result, concurrency=8, per_host=2, delay=0.8, budget=None):
+    """Fetch every source concurrently and call on_result(i, src, html, seconds) as each body arrives
+    (awaited if it is a coroutine). on_result may return further sources (crawled pages), which are
+    fetched the same way. Sources are started in list order; those still pending after `budget`
+    seconds are cancelled."""
+    pool=asyncio.Semaphore(max(1,concurrency)); gates={}; tasks=set()
+    loop=asyncio.get_running_loop(); deadline=None if budget is None else loop.time()+budget
+    def spawn(i, s): tasks.add(asyncio.create_task(one(i, s)))
+    async def one(i, s):
+        h=urlparse(s["url"]).netloc.lower()
+        gate=gates.setdefault(h, HostGate(per_host, delay))
+        async with gate:
+            async with pool:
+                t0=time.perf_counter()
+                html=await asyncio.to_thread(get, s["url"], TTL, 20)
+                elapsed=time.perf_counter()-t0
+        res=on_result(i, s, html, elapsed)
+        if asyncio.iscoroutine(res): res=await res
+        for extra in res or (): spawn(i, extra)
+    for i,s in enumerate(sources): spawn(i, s)
+    while tasks:
+        timeout=None if deadline is None else deadline-loop.time()
+        if timeout is not None and timeout<=0: break
+        done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        tasks-=done
+    pending=list(tasks)
+    for t in pending: t.cancel()
+    if pending:
+        logging.info("fetch budget hit: %d sources cancelled", len(pending))
+        await asyncio.gather(*pending, return_exceptions=True)
+
 def atomic_write(obj):
     pending="data.pending.json"; final="data.json"
     with open(pending,"w",encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
+        json.dump(obj, f, ensure_ascii=False, separators=(",",":"))
     ok = isinstance(obj.get("jobListings"), list) and all(j.get("applyLink") for j in obj["jobListings"])
     if ok: os.replace(pending, final)
     else: os.remove(pending)
 
-def main():
-    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
-    collected=[]; used=[]; start=time.time(); N_MIN=25; T_MAX=60
-    for s in SOURCES:
-        items=fetch_and_parse(s)
-        if items:
-            collected.extend(items); used.append(s["name"])
-        if not IS_LIGHT and (len(collected)>=N_MIN or (time.time()-start)>T_MAX): break
-        time.sleep(0.8)
-    # Prefer official; if aggregator duplicates exist, pick the one with higher aggregatorScores
-    seen={}
-    for j in collected:
-        k = (j["title"].lower(), urlparse(j["applyLink"]).path.lower())
-        if k not in seen:
-            seen[k]=j
+# ---------------- Incremental publish ----------------
+# Scraped listings are folded into the previous snapshot by id. meta.scrapeHash fingerprints the
+# fields this stage owns, so a record whose scrape did not change keeps whatever later stages
+# (merge/QC) attached to it; changed records get their scraped fields refreshed.
+SCRAPED_FIELDS = ("title","applyLink","detailLink","qualificationLevel","source","type")
+
+def scrape_hash(j):
+    m=j.get("meta") or {}
+    raw=json.dumps([[j.get(k) for k in SCRAPED_FIELDS], m.get("sourceUrl"), m.get("sourceSite")], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def load_previous(path="data.json"):
+    try: return json.load(open(path,"r",encoding="utf-8"))
+    except Exception: return {}
+
+def apply_delta(prev, fresh, fetched):
+    """Return (listings, changelog). Previous records are only dropped when their source page was
+    fetched this run and no longer lists them; sources that failed or ran out of budget keep theirs.
+    prev["archivedIds"] (any container, e.g. tools.store lookups) replaces scanning prev's archive.
+    Update notices that QC already merged into a previous parent's "updates" are known, not added."""
+    old={j["id"]: j for j in prev.get("jobListings") or [] if j.get("id")}
+    archived=prev["archivedIds"] if "archivedIds" in prev else {j.get("id") for j in prev.get("archivedListings") or []}
+    merged=set()
+    for p in old.values():
+        for u in p.get("updates") or []:
+            merged.add(u.get("id") or (u.get("link"), u.get("title")))
+    out=[]; seen=set(); log={"added":[], "changed":[], "removed":[], "unchanged":0, "stillArchived":0, "alreadyMerged":0}
+    for j in fresh:
+        jid=j["id"]; seen.add(jid)
+        j.setdefault("meta",{})["scrapeHash"]=scrape_hash(j)
+        if jid in archived:
+            log["stillArchived"]+=1; continue
+        p=old.get(jid)
+        if p is None:
+            out.append(j)
+            if jid in merged or (j.get("applyLink"), j.get("title")) in merged: log["alreadyMerged"]+=1
+            else: log["added"].append(j)
+        elif (p.get("meta") or {}).get("scrapeHash")!=j["meta"]["scrapeHash"]:
+            p.update({k:j[k] for k in SCRAPED_FIELDS+("extractedAt","meta")})
+            out.append(p); log["changed"].append(p)
         else:
-            a=seen[k]; b=j
-            if a["source"]=="official" and b["source"]!="official": continue
-            if b["source"]=="official" and a["source"]!="official": seen[k]=b; continue
-            # both aggregators: prefer higher score; original two keep higher defaults via rules.json
-            sa=AGG_SCORES.get(urlparse(a["meta"]["sourceUrl"]).netloc, 0.5)
-            sb=AGG_SCORES.get(urlparse(b["meta"]["sourceUrl"]).netloc, 0.5)
-            if sb>sa: seen[k]=b
-    final=list(seen.values())
+            p["extractedAt"]=j["extractedAt"]; out.append(p); log["unchanged"]+=1
+    for jid,p in old.items():
+        if jid in seen: continue
+        if (p.get("meta") or {}).get("sourceUrl") in fetched:
+            log["removed"].append(jid); continue
+        out.append(p)
+    return out, log
+
+def scrape(incremental=None, previous=None):
+    """Fetch, parse and dedup every due source. Nothing is written; returns {"data", "changes", "health",
+    "stats"} for the caller (main() below, or pipeline.py) to persist. `previous` replaces data.json as
+    the snapshot an incremental run is diffed against."""
+    incremental=ARGS.incremental if incremental is None else incremental
+    collected=[]; used=[]; start=time.time(); T_MAX=60
+    results={}; fetched=set()
+    # Adaptive order: highest expected yield per second first; sources not due this mode are skipped
+    # (only when --incremental keeps their previous listings) and left for a later run.
+    stats=load_stats()
+    sources, skipped = plan(SOURCES, stats, RUN_MODE, allow_skip=incremental)
+    pos={s["name"]:k for k,s in enumerate(SOURCES)}
+    # Pagination / "view all" pages behind each source; with --incremental, pages linked from an unchanged
+    # page are skipped while fresh (their previous listings are kept by apply_delta).
+    front=Frontier(pages_per_host=ARGS.crawl_pages, skip_seen=incremental)
+    front.exclude(s["url"] for s in SOURCES)
+    # Fetching stays on the event loop; large bodies are parsed in worker processes as they arrive. Workers
+    # come from a forkserver, not fork(), since this process already runs resolver/executor threads.
+    pool=ProcessPoolExecutor(ARGS.parse_workers, mp_context=multiprocessing.get_context("forkserver")) if ARGS.parse_workers>1 else None
+    async def on_result(i, s, html, elapsed):
+        if html: fetched.add(s["url"])
+        items=await parse_async(s, html, pool)
+        depth=s.get("depth",0)
+        if not depth: record(stats, s["url"], bool(html), elapsed, len(items), hashlib.sha1(html).hexdigest() if html else None)
+        if items: results[(pos[s["name"]], depth, s["url"])]=items
+        if not html: return ()
+        front.discover(html, s["url"], depth, front.visit(s["url"], html))
+        return [{**s, "url":u, "depth":d} for u,d,_ in front.drain()]
+    try:
+        with phase("fetch_parse"):
+            asyncio.run(fetch_all(sources, on_result, ARGS.concurrency, ARGS.per_host, ARGS.host_delay, None if IS_LIGHT else T_MAX))
+    finally:
+        if pool: pool.shutdown(cancel_futures=True)
+        front.seen.save()
+        pruned=prune_memo()
+        if pruned: logging.info("parse memo: pruned %d unused entries", pruned)
+    # Re-assemble in SOURCES order (crawled pages after their source) so duplicate resolution does not
+    # depend on arrival order
+    for k in sorted(results):
+        collected.extend(results[k])
+        if SOURCES[k[0]]["name"] not in used: used.append(SOURCES[k[0]]["name"])
+    logging.info("fetched %d sources + %d crawled pages (%d with items, %d not due) in %.1fs", len(sources), front.stats["crawled"], len(used), len(skipped), time.time()-start)
+    # Collapse the same notice seen on several sites: prefer official, then the higher aggregatorScores
+    # (original two keep higher defaults via rules.json); the others are kept as corroboration.
+    with phase("dedup"):
+        final=collapse(collected, lambda j: (j["source"]=="official", AGG_SCORES.get(urlparse(j["meta"]["sourceUrl"]).netloc, 0.5)))
     for j in final:
         j.setdefault("domicile","All India")
-    transp={"schemaVersion":"1.5","runMode":RUN_MODE,"totalListings":len(final),"sourcesTried":used,"lastUpdated":datetime.utcnow().isoformat()+"Z"}
-    data={"jobListings":final,"archivedListings":[],"transparencyInfo":transp}
-    atomic_write(data)
-    json.dump({"ok":bool(final),**transp}, open("health.json","w",encoding="utf-8"), indent=2)
+    now=datetime.utcnow().isoformat()+"Z"; archived=[]; changes=None; prev={}
+    if incremental:
+        prev=load_previous() if previous is None else previous
+        final, changes = apply_delta(prev, final, fetched)
+        archived=list(prev.get("archivedListings") or [])
+    transp={"schemaVersion":"1.5","runMode":RUN_MODE,"totalListings":len(final),"sourcesTried":used,"lastUpdated":now}
+    if skipped: transp["sourcesSkipped"]=[s["name"] for s in skipped]
+    if front.stats["queued"] or front.stats["skippedSeen"]: transp["crawl"]=front.stats
+    if failure_counts(): transp["fetchFailures"]=failure_counts()
+    if changes is not None:
+        transp["changes"]={k:(len(v) if isinstance(v,list) else v) for k,v in changes.items()}
+    data={"jobListings":final,"archivedListings":archived,"transparencyInfo":transp}
+    if changes is not None:
+        changes={"generatedAt":now, "runMode":RUN_MODE, "since":(prev.get("transparencyInfo") or {}).get("lastUpdated"), **changes}
+    return {"data":data, "changes":changes, "health":{"ok":bool(final),**transp}, "stats":stats}
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+    stage("scraper")
+    res=scrape()
+    save_stats(res["stats"])
+    atomic_write(res["data"])
+    if res["changes"] is not None:
+        json.dump(res["changes"], open("changes.json","w",encoding="utf-8"), indent=2, ensure_ascii=False)
+    json.dump(res["health"], open("health.json","w",encoding="utf-8"), indent=2)
 
 if __name__=="__main__": main()
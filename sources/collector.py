@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 # collector.py — official-first hybrid with all 5 aggregators, reopened handling, and cross-aggregator corroboration
-import requests, json, sys, re, time, os, hashlib, pathlib
+import json, sys, re, time, os, hashlib, pathlib, multiprocessing
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.eligibility import classify, excluded
+from tools.httpclient import cached_get, failure_counts
+from tools.neardup import collapse
+from tools.frontier import Frontier, Seen, PAGES_PER_HOST, COLLECTOR_SEEN_PATH
+from tools.perf import stage
 
-UA = {"User-Agent":"Mozilla/5.0"}
 try:
     RULES = json.loads(pathlib.Path("rules.json").read_text(encoding="utf-8"))
 except Exception:
@@ -32,13 +39,7 @@ AGGREGATORS = [
     ("https://www.adda247.com/jobs/", "a[href]")
 ]
 
-NEG_TOK = re.compile(r"\b(result|cutoff|exam\s*date|admit\s*card|syllabus|answer\s*key)\b", re.I)
-ALLOW_UPDATE = re.compile(r"\b(corrigendum|extension|extended|addendum|amendment|revised|rectified|last\s*date|re-?open|re-?opened|reopening)\b", re.I)
-ALLOW_EDU = re.compile(r"(10th|matric|ssc\b|12th|intermediate|hsc|any\s+graduate|graduate\b)", re.I)
-BLOCK = re.compile(r"(teacher|tgt|pgt|prt|b\.?ed|ctet|tet|b\.?tech|m\.?tech|b\.e|m\.e|mca|bca|developer|architect|analyst|nursing|pharma|iti|polytechnic|diploma|mba|msc|m\.sc|phd|post\s*graduate)", re.I)
-
 POSTS_PAT = re.compile(r"(\d{1,6})\s*(posts?|vacanc(?:y|ies)|seats?)", re.I)
-DATE_PAT  = re.compile(r"(\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b)", re.I)
 
 def clean(s): return re.sub(r"\s+"," ", (s or "").strip())
 def host(u):
@@ -49,79 +50,102 @@ def is_official(url):
     h=host(url)
     return (h.endswith(".gov.in") or h.endswith(".nic.in") or h.endswith(".gov") or h.endswith(".go.in") or "rbi.org.in" in h or "isro.gov.in" in h)
 
-def fetch(base, selector):
+def parse_links(body, base, selector):
+    """Anchor filter for one downloaded page; module-level so worker processes can run it."""
     try:
-        r = requests.get(base, timeout=30, headers=UA)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = BeautifulSoup(body, "html.parser")
         out=[]
         for a in soup.select(selector):
-            t = a.get_text(" ", strip=True); h=a.get("href","")
+            t = clean(a.get_text(" ", strip=True)); h=a.get("href","")
             if not t or not h: continue
-            if NEG_TOK.search(t) and not ALLOW_UPDATE.search(t): continue
-            if not (ALLOW_EDU.search(t) or ALLOW_UPDATE.search(t)): continue
+            c = classify(t)
+            if c.negative and not c.update: continue
+            if c.band=="N/A" and not c.update: continue
             url = h if h.startswith("http") else urljoin(base, h)
-            out.append({"title":clean(t),"url":url,"isOfficial":is_official(url)})
+            out.append({"title":t,"url":url,"isOfficial":is_official(url)})
         return out
-    except:
+    except Exception:
         return []
 
+def fetch(base, selector):
+    # same .cache store as scraper.get(): pages the scraper already fetched this run are not re-downloaded
+    body = cached_get(base, timeout=30)
+    return parse_links(body, base, selector) if body else []
+
 def posts_from_text(txt):
     m=POSTS_PAT.search(txt or "")
     if not m: return None
     try: return int(m.group(1))
     except: return None
 
-def collect():
-    res=[]
-    for base,sel,org,dom in OFFICIAL_SITES:
-        for it in fetch(base, sel):
-            if BLOCK.search(it["title"]) and not ALLOW_UPDATE.search(it["title"]): continue
-            rec={
-                "title":it["title"], "applyLink":it["url"], "detailLink":it["url"],
-                "source":"official","domicile":"All India","type":"UPDATE" if ALLOW_UPDATE.search(it["title"]) else "VACANCY",
-                "qualificationLevel":"Any graduate"
-            }
-            p=posts_from_text(it["title"]); 
-            if p: rec["numberOfPosts"]=p
-            res.append(rec)
-        time.sleep(0.25)
-    # all five aggregators
-    for base,sel in AGGREGATORS:
-        for it in fetch(base, sel):
-            if BLOCK.search(it["title"]) and not ALLOW_UPDATE.search(it["title"]): continue
-            rec={
-                "title":it["title"], "applyLink":it["url"], "detailLink":it["url"],
-                "source":"aggregator","domicile":"All India","type":"UPDATE" if ALLOW_UPDATE.search(it["title"]) else "VACANCY",
-                "qualificationLevel":"Any graduate",
-                "flags":{"fromAggregator":host(base)}
-            }
-            p=posts_from_text(it["title"]); 
-            if p: rec["numberOfPosts"]=p
-            res.append(rec)
-        time.sleep(0.2)
-    return res
+def to_record(it, base, kind):
+    c=classify(it["title"])
+    if excluded(c, strict=True) and not c.update: return None
+    rec={
+        "title":it["title"], "applyLink":it["url"], "detailLink":it["url"],
+        "source":kind,"domicile":"All India","type":"UPDATE" if c.update else "VACANCY",
+        "qualificationLevel":c.band if c.band!="N/A" else "Any graduate"
+    }
+    if kind=="aggregator": rec["flags"]={"fromAggregator":host(base)}
+    rec["meta"]={"sourceUrl":base}
+    p=posts_from_text(it["title"])
+    if p: rec["numberOfPosts"]=p
+    return rec
+
+# Pages at least this large are parsed in the process pool while the next page downloads;
+# small official pages are parsed inline.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+POOL_MIN_BYTES = 64*1024
+
+def collect(workers=PARSE_WORKERS, crawl_pages=PAGES_PER_HOST):
+    # official sites first, then all five aggregators; pagination / "view all" pages found on them
+    # (e.g. ISRO's ViewAllOpportunities) follow within the per-host crawl budget
+    # own seen set: the scraper has usually just fetched these landing pages, which must not make them
+    # look unchanged here and cost the collector their follow-up pages
+    front=Frontier(pages_per_host=crawl_pages, seen=Seen(COLLECTOR_SEEN_PATH))
+    for base,sel,org,dom in OFFICIAL_SITES: front.add(base, item=(sel,"official",0.25))
+    for base,sel in AGGREGATORS: front.add(base, item=(sel,"aggregator",0.2))
+    # forkserver: pipeline.py runs this after the scraper, whose threads must not be forked into workers
+    pool=ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("forkserver")) if workers>1 else None
+    parsed=[]
+    try:
+        while True:
+            nxt=front.pop()
+            if nxt is None: break
+            base,depth,(sel,kind,pause)=nxt
+            body=cached_get(base, timeout=30)
+            if pool and len(body)>=POOL_MIN_BYTES: parsed.append((base, kind, pool.submit(parse_links, body, base, sel)))
+            else: parsed.append((base, kind, parse_links(body, base, sel) if body else []))
+            if body: front.discover(body, base, depth, front.visit(base, body), (sel,kind,pause))
+            time.sleep(pause)
+        front.seen.save()
+        res=[]
+        for base,kind,items in parsed:
+            if not isinstance(items, list): items=items.result()
+            for it in items:
+                rec=to_record(it, base, kind)
+                if rec: res.append(rec)
+        return res
+    finally:
+        if pool: pool.shutdown(cancel_futures=True)
 
 def dedup_and_rank(items):
-    bykey={}
-    for j in items:
-        key=(j["title"].lower(), urlparse(j["applyLink"]).path.lower())
-        if key not in bykey:
-            bykey[key]=j; continue
-        a=bykey[key]; b=j
-        if a["source"]=="official" and b["source"]!="official": continue
-        if b["source"]=="official" and a["source"]!="official": bykey[key]=b; continue
-        sa=AGG_SCORES.get(host(a["detailLink"]), 0.6)
-        sb=AGG_SCORES.get(host(b["detailLink"]), 0.6)
-        # keep the one with higher aggregator score
-        if sb>sa: bykey[key]=b
-        # if both present, mark corroborated to boost later learning
-        bykey[key].setdefault("flags",{})["corroborated"]=True
-    return list(bykey.values())
+    # near-duplicates across sites collapse to one record: official first, then the higher aggregator
+    # score; the rest mark it corroborated (boosts later learning) and are listed in flags.alsoAt
+    return collapse(items, lambda j: (j["source"]=="official", AGG_SCORES.get(host(j["detailLink"]), 0.6)))
 
-if __name__=="__main__":
-    out = collect()
-    out = dedup_and_rank(out)
+def candidates(workers=PARSE_WORKERS):
+    out = dedup_and_rank(collect(workers))
     for j in out:
         j.setdefault("domicile","All India")
-    print("\n".join(json.dumps(j, ensure_ascii=False) for j in out))
+    return out
+
+if __name__=="__main__":
+    stage("collector")
+    out = candidates()
+    # JSONL to the path given (as the workflow expects), else stdout
+    dst = open(sys.argv[1], "w", encoding="utf-8") if len(sys.argv)>1 else sys.stdout
+    for j in out: dst.write(json.dumps(j, ensure_ascii=False)+"\n")
+    if dst is not sys.stdout: dst.close()
+    if failure_counts():
+        print(json.dumps({"fetchFailures": failure_counts()}), file=sys.stderr)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# bench.py — offline benchmarks for the scrape -> merge -> QC hot paths
+#   python tools/bench.py parse [page.html ...]      # parse_generic before/after on cached or given pages
+#   python tools/bench.py record [dir]               # snapshot the pages in .cache as fixtures
+#   python tools/bench.py fixtures [dir]             # replay fixtures: parse_generic, dispatch_seed, collector.fetch
+#   python tools/bench.py scale [1000 10000 100000]  # synthetic listings + feedback through merge and QCEngine
+# With no paths, parse replays the aggregator pages captured in .cache (falls back to a synthetic page).
+# Nothing touches the network: collector.fetch is served by a local http.server stand-in.
+import sys, os, json, time, re, pathlib, hashlib, random, shutil, tempfile, threading, tracemalloc
+import http.server
+from urllib.parse import urlparse
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import scraper, qc_and_learn
+from bs4 import BeautifulSoup
+from tools import httpclient, schema_merge
+sys.path.insert(0, str(ROOT/"sources"))
+import collector
+FIXTURES = pathlib.Path(os.getenv("BENCH_FIXTURES", "bench_fixtures"))
+
+LEGACY_REOPEN = re.compile(r"\b(re-?open|re-?opened|reopening|corrigendum|extension|extended|last\s*date|addendum|amendment)\b", re.I)
+def legacy_allow_link_text(t, h):
+    tl=t.lower(); hl=(h or "").lower()
+    if any(x in tl for x in ["recruit","vacan","notific","apply","advert","employment","assistant","officer","constable","clerk"]): return True
+    if LEGACY_REOPEN.search(tl) or LEGACY_REOPEN.search(hl): return True
+    return False
+
+def legacy_parse_generic(content, source, base):
+    # parse_generic as it was before the single-pass extractor (reference for "before" numbers)
+    soup=BeautifulSoup(content,"html.parser"); out=[]
+    for a in soup.select("table a[href], main a[href], .entry-content a[href], a[href]"):
+        t=scraper.clean(a.get_text()); h=a.get("href","")
+        if not t or not h: continue
+        if not legacy_allow_link_text(t,h): continue
+        j=scraper.build_job(source, base, t, h)
+        if j: out.append(j)
+    return out
+
+WORDS = ["SSC","CGL","Bihar","Police","Constable","Railway","Group D","Bank","Clerk","Assistant","Officer","Teacher","TGT",
+         "B.Tech","Engineer","Admit Card","Result","Answer Key","Syllabus","Notification","Recruitment","Online Form","2025"]
+EDU = ["10th pass","12th pass","Any Graduate","Graduate","Diploma","MBA",""]
+
+def synthetic_page(n=3000, seed=7):
+    rnd=random.Random(seed); rows=[]
+    for i in range(n):
+        title=" ".join(rnd.sample(WORDS, 4))+" "+rnd.choice(EDU)+f" {rnd.randint(10,5000)} Posts"
+        rows.append(f'<tr><td><a href="/job/{i}-{hashlib.md5(title.encode()).hexdigest()[:6]}/">{title}</a></td><td>{rnd.randint(1,28)}/10/2025</td></tr>')
+    nav="".join(f'<li><a href="/cat/{w.lower()}">{w}</a></li>' for w in WORDS)
+    return (f"<html><head><title>jobs</title></head><body><ul>{nav}</ul><main><div class='entry-content'><table>"
+            + "".join(rows) + "</table></div></main></body></html>").encode()
+
+def cached_aggregator_pages():
+    hosts={urlparse(b["url"]).netloc for b in scraper.BASE}; pages=[]
+    for m in sorted(pathlib.Path(".cache").glob("*.json")):
+        try: meta=json.loads(m.read_text(encoding="utf-8"))
+        except Exception: continue
+        body=m.with_suffix(".html")
+        if urlparse(meta.get("url") or "").netloc in hosts and body.exists():
+            pages.append((meta["url"], body.read_bytes()))
+    return pages
+
+def count_anchors(content):
+    return sum(1 for _ in scraper.iter_anchors(content))
+
+def timed(fn, content, reps):
+    t=time.perf_counter(); out=None
+    for _ in range(reps): out=fn(content, "bench", "https://bench.local/")
+    return (time.perf_counter()-t)/reps, out
+
+def bench_parse(paths, reps=3):
+    pages=[(p, pathlib.Path(p).read_bytes()) for p in paths] or cached_aggregator_pages()
+    if not pages: pages=[("synthetic:3000", synthetic_page())]
+    tot={"anchors":0,"before":0.0,"after":0.0}
+    for name, content in pages:
+        n=count_anchors(content)
+        tb, jb = timed(legacy_parse_generic, content, reps)
+        ta, ja = timed(scraper.parse_generic, content, reps)
+        tot["anchors"]+=n; tot["before"]+=tb; tot["after"]+=ta
+        print(f"{name}: anchors={n} jobs={len(jb)}->{len(ja)} "
+              f"before={n/tb:,.0f} anchors/s after={n/ta:,.0f} anchors/s ({tb/ta:.1f}x)")
+    if len(pages)>1:
+        print(f"total: anchors={tot['anchors']} before={tot['anchors']/tot['before']:,.0f}/s after={tot['anchors']/tot['after']:,.0f}/s")
+
+def record(dest=FIXTURES):
+    """Copy every cached page (body + meta) into `dest`, so replays do not depend on cache churn."""
+    dest=pathlib.Path(dest); dest.mkdir(parents=True, exist_ok=True); n=0
+    for m in sorted(pathlib.Path(".cache").glob("*.json")):
+        body=m.with_suffix(".html")
+        if body.exists():
+            shutil.copy(m, dest/m.name); shutil.copy(body, dest/body.name); n+=1
+    print(f"recorded {n} pages into {dest}")
+
+def load_fixtures(src=FIXTURES):
+    pages=[]
+    for m in sorted(pathlib.Path(src).glob("*.json")):
+        try: meta=json.loads(m.read_text(encoding="utf-8"))
+        except Exception: continue
+        body=m.with_suffix(".html")
+        if meta.get("url") and body.exists(): pages.append((meta["url"], body.read_bytes()))
+    return pages
+
+class StandIn:
+    """Local http.server serving fixture bodies at /<n>.html, in place of the real sites."""
+    def __init__(self, pages):
+        bodies={f"/{i}.html":b for i,(_,b) in enumerate(pages)}
+        class H(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                b=bodies.get(self.path)
+                self.send_response(200 if b is not None else 404)
+                self.send_header("Content-Type","text/html; charset=utf-8"); self.send_header("Content-Length",str(len(b or b"")))
+                self.end_headers(); self.wfile.write(b or b"")
+            def log_message(self, *a): pass
+        self.srv=http.server.ThreadingHTTPServer(("127.0.0.1",0), H)
+        self.base=f"http://127.0.0.1:{self.srv.server_address[1]}"
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+    def url(self, i): return f"{self.base}/{i}.html"
+    def close(self): self.srv.shutdown()
+
+def peak(fn, make=tuple):
+    """(seconds, peak traced MiB, result) of fn(*make()). Timed untraced, then run again under
+    tracemalloc for the memory figure (tracing slows the call several times over)."""
+    a=make(); t=time.perf_counter(); out=fn(*a); el=time.perf_counter()-t
+    a=make(); tracemalloc.start()
+    try: fn(*a)
+    finally:
+        _,pk=tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return el, pk/2**20, out
+
+def row(name, n, unit, el, mb):
+    print(f"{name:<28}{n:>9} {unit:<8}{el:>8.3f}s {n/el if el else 0:>12,.1f}/s {mb:>8.1f} MiB")
+
+def bench_fixtures(src=FIXTURES):
+    pages=load_fixtures(src) or cached_aggregator_pages()
+    if not pages: pages=[("https://bench.local/", synthetic_page())]
+    nbytes=sum(len(b) for _,b in pages)
+    print(f"{len(pages)} pages, {nbytes/2**20:.1f} MiB")
+    for name, fn in (("parse_generic", scraper.parse_generic), ("dispatch_seed", scraper.dispatch_seed)):
+        el,mb,jobs=peak(lambda: sum(len(fn(b, "bench", u)) for u,b in pages))
+        row(name, sum(count_anchors(b) for _,b in pages), "anchors", el, mb)
+    srv=StandIn(pages); cache=httpclient.CACHE; tmp=pathlib.Path(tempfile.mkdtemp(prefix="bench-cache-"))
+    def fresh_cache():
+        # an empty cache per run, so every page is really downloaded from the stand-in
+        httpclient.CACHE=pathlib.Path(tempfile.mkdtemp(dir=tmp)); return ()
+    try:
+        el,mb,_=peak(lambda: sum(len(collector.fetch(srv.url(i), "a[href]")) for i in range(len(pages))), fresh_cache)
+        row("collector.fetch (local)", len(pages), "pages", el, mb)
+    finally:
+        httpclient.CACHE=cache; srv.close(); shutil.rmtree(tmp, ignore_errors=True)
+
+ORGS=["bssc","bpsc","ssc","ibps","rrb","upsc","dsssb","nhm"]
+def synthetic_listings(n, seed=11):
+    rnd=random.Random(seed); out=[]
+    for i in range(n):
+        org=rnd.choice(ORGS); d=rnd.randint(1,28)
+        out.append({"id":f"b{i}","title":f"{org.upper()} Advt No {i%97}/2025 {rnd.choice(WORDS)} {rnd.choice(EDU) or 'Graduate'} {rnd.randint(10,900)} Posts",
+                    "applyLink":f"https://{org}.gov.in/adv/{i}/ADVT_{i}.pdf","deadline":f"{d:02d}/{rnd.randint(1,12):02d}/2026",
+                    "source":rnd.choice(["official","aggregator"]),"type":"VACANCY","qualificationLevel":"Any graduate"})
+    return out
+
+def synthetic_feedback(listings, n, seed=12):
+    rnd=random.Random(seed); votes=[]; reports=[]
+    for _ in range(n):
+        j=rnd.choice(listings)
+        votes.append({"type":"vote","vote":rnd.choice(["right","wrong","right"]),"jobId":j["id"],"title":j["title"],"url":j["applyLink"],"ts":"2026-01-01T00:00:00Z"})
+        if rnd.random()<0.2:
+            # codes QCEngine.apply_reports acts on: deadline correction, non-vacancy learning, closure
+            r={"type":"report","jobId":j["id"],"reasonCode":rnd.choice(["wrong_last_date","not_vacancy","last_date_over"]),"title":j["title"],"url":j["applyLink"],"ts":"2026-01-01T00:00:00Z"}
+            if r["reasonCode"]=="wrong_last_date": r["lastDate"]=f"{rnd.randint(1,28):02d}/{rnd.randint(1,12):02d}/2026"
+            reports.append(r)
+    return votes, reports
+
+def bench_merge(n):
+    existing=synthetic_listings(n)
+    # a fifth of the candidates update existing listings, the rest are new; merge mutates its
+    # inputs, so each run gets fresh copies
+    cands=[dict(j, numberOfPosts=7) for j in existing[::5]] + synthetic_listings(n-n//5, seed=13)
+    for j in cands[n//5:]: j["applyLink"]+="?new"; j["title"]+=" New"
+    el,mb,_=peak(schema_merge.merge, lambda: ([dict(j) for j in existing], iter([dict(j) for j in cands])))
+    row("schema_merge.merge", n, "cands", el, mb)
+
+def bench_qc(n):
+    """QCEngine in-process on synthetic listings, with votes/reports passed as event lists."""
+    jobs=synthetic_listings(n); votes,reports=synthetic_feedback(jobs, n//2)
+    rules=json.loads((ROOT/"rules.json").read_text(encoding="utf-8"))
+    def make():
+        data={"jobListings":[dict(j) for j in jobs],"archivedListings":[],"transparencyInfo":{}}
+        return data, {"votes":votes, "reports":reports, "submissions":[]}
+    el,mb,_=peak(lambda data, fb: qc_and_learn.QCEngine(json.loads(json.dumps(rules)), {}).run(data, fb), make)
+    row("QCEngine.run", n, "listings", el, mb)
+
+def bench_scale(sizes):
+    print(f"{'stage':<28}{'n':>9} {'unit':<8}{'time':>9} {'throughput':>14} {'peak':>12}")
+    for n in sizes:
+        bench_merge(n); bench_qc(n)
+
+if __name__=="__main__":
+    cmds={"parse":lambda a: bench_parse(a), "record":lambda a: record(*a[:1]), "fixtures":lambda a: bench_fixtures(*a[:1]),
+          "scale":lambda a: bench_scale([int(x) for x in a] or [1000,10000,100000])}
+    if len(sys.argv)<2 or sys.argv[1] not in cmds:
+        print("Usage: python tools/bench.py parse [page.html ...] | record [dir] | fixtures [dir] | scale [n ...]")
+        sys.exit(2)
+    cmds[sys.argv[1]](sys.argv[2:])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# dates.py — the one date parser shared by scraper/merge/QC/validation and PDF enrichment
+#   python tools/dates.py "5th March, 2025" 05-03-25 2025-03-05 ...
+# Dates are day-first (Indian notices). The known shapes (dd/mm/yyyy with / - or ., ISO yyyy-mm-dd,
+# "5 Mar 2025" / "5th March, 2025", two-digit years as 20yy) are recognised by a single regex whose
+# matching branch says how to read the groups, so a string is scanned once instead of tried against a list
+# of strptime formats. Results are memoized. dateparser, when installed, is only consulted for short
+# leftovers by callers that ask for it (fallback=True), and at most FALLBACK_BUDGET times per process.
+import os, re, sys
+from datetime import date
+from functools import lru_cache
+try:
+    import dateparser
+except Exception:
+    dateparser = None
+
+FALLBACK_BUDGET = int(os.getenv("DATEPARSER_BUDGET", "500"))
+FALLBACK_MAX_LEN = 40
+
+MONTHS = {}
+for i,m in enumerate(["january","february","march","april","may","june","july","august","september","october","november","december"]):
+    MONTHS[m] = MONTHS[m[:3]] = i+1
+MONTHS["sept"] = 9
+MONTH = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+# groups: ISO y,m,d (1-3) | numeric d,sep,m,y (4-7) | words d,month,y (8-10); the separator is named so
+# the pattern can be embedded in larger expressions (tools/pdf_enrich.py)
+PATTERN = (r"(?<!\d)(?:(\d{4})-(\d{1,2})-(\d{1,2})"
+           r"|(\d{1,2})(?P<sep>[./-])(\d{1,2})(?P=sep)(\d{4}|\d{2})"
+           r"|(\d{1,2})(?:st|nd|rd|th)?[\s-]+(" + MONTH + r")\.?,?[\s-]+(\d{4}|\d{2}))(?!\d)")
+SCAN = re.compile(PATTERN, re.I)
+
+def _year(y): return int(y)+2000 if len(y)==2 else int(y)
+
+def _from_match(m):
+    g = m.groups()
+    try:
+        if g[0]: return date(int(g[0]), int(g[1]), int(g[2]))
+        if g[3]: return date(_year(g[6]), int(g[5]), int(g[3]))
+        return date(_year(g[9]), MONTHS[g[8].lower()], int(g[7]))
+    except ValueError:
+        return None
+
+_fallback_used = 0
+def _fallback(s):
+    global _fallback_used
+    if dateparser is None or _fallback_used>=FALLBACK_BUDGET or len(s)>FALLBACK_MAX_LEN or not any(c.isdigit() for c in s):
+        return None
+    _fallback_used += 1
+    try:
+        dt = dateparser.parse(s, languages=["en"], settings={"DATE_ORDER": "DMY", "STRICT_PARSING": True})
+    except Exception:
+        return None
+    return dt.date() if dt else None
+
+@lru_cache(maxsize=1<<16)
+def _parse(s, fallback):
+    m = SCAN.fullmatch(s)
+    if m: return _from_match(m)
+    return _fallback(s) if fallback else None
+
+def parse(s, fallback=False):
+    """date of one deadline-like string; None for empty/"N/A"/unparseable values."""
+    if not isinstance(s, str): return None
+    s = s.strip()
+    if not s or s.upper()=="N/A": return None
+    return _parse(s, fallback)
+
+def fmt(d): return d.strftime("%d/%m/%Y")
+
+def normalize(s, fallback=True):
+    """dd/mm/yyyy form of `s`, or None when it is not a date."""
+    d = parse(s, fallback)
+    return fmt(d) if d else None
+
+@lru_cache(maxsize=1<<14)
+def _find(text):
+    return tuple(d for d in map(_from_match, SCAN.finditer(text)) if d)
+
+def find_all(text):
+    """Every date written in free text (update titles, PDF pages), in order of appearance."""
+    return list(_find(text)) if text else []
+
+def days_left(s, today=None):
+    d = parse(s)
+    return None if d is None else (d-(today or date.today())).days
+
+def days_left_all(values, today=None, floor=None):
+    """daysLeft for each deadline string in `values` (None where unparseable), against one `today`;
+    each distinct string is computed once. `floor` clamps the result from below."""
+    today = today or date.today(); memo = {}; out = []
+    for v in values:
+        key = v if isinstance(v, str) else None
+        if key not in memo:
+            n = days_left(key, today)
+            memo[key] = None if n is None else (n if floor is None else max(n, floor))
+        out.append(memo[key])
+    return out
+
+if __name__ == "__main__":
+    for s in sys.argv[1:]:
+        d = parse(s, fallback=True)
+        print(f"{s!r:<32} {fmt(d) if d else '-':<12} {[fmt(x) for x in find_all(s)]}")
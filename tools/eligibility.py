@@ -1,27 +1,89 @@
 #!/usr/bin/env python3
-import re
+# eligibility.py — single-pass title classifier shared by scraper.py, sources/collector.py and tools
+import re, json, hashlib
+from collections import namedtuple
+from functools import lru_cache
 
-TEACHER = {"teacher","tgt","pgt","prt","faculty","lecturer","assistant professor","professor","b.ed","ctet","tet "}
-TECH = {"b.tech","btech","b.e","m.tech","m.e","mca","bca","engineer","developer","scientist","architect","analyst","devops","cloud","ml","ai","research","nursing","pharmac","iti","polytechnic","diploma"}
-PG = {"mba","pg ","post graduate","postgraduate","phd","m.phil","mcom","m.com","ma ","m.a","msc","m.sc","mca","mba"}
+# Every term list lives here so all stages agree on the same title.
+# Terms match on word boundaries; a trailing "*" makes it a prefix term ("recruit*" ~ "recruitment").
+TERMS = {
+    "band10":   ["10th","matric*","ssc"],
+    "band12":   ["12th","intermediate","hsc"],
+    "graduate": ["any graduate","any degree","graduate*","undergraduate*"],
+    "teacher":  ["teacher*","tgt","pgt","prt","faculty","lecturer*","assistant professor*","professor*","b.ed","ctet","tet"],
+    "tech":     ["b.tech","btech","b.e","m.tech","m.e","mca","bca","engineer*","developer*","scientist*","architect*","analyst*",
+                 "devops","cloud","ml","ai","research","nursing","pharma*","iti","polytechnic","diploma"],
+    "pg":       ["mba","pg","post graduate","postgraduate","phd","m.phil","mcom","m.com","ma","m.a","msc","m.sc"],
+    "skill":    ["steno*","shorthand","trade test","cad","sap","oracle","aws","azure","docker","kubernetes","tally erp"],
+    "update":   ["re-open*","reopen*","corrigendum","extension","extended","last date","lastdate","addendum","amendment",
+                 "revised","rectified"],
+    "negative": ["result*","cutoff*","cut off","exam date*","admit card*","syllabus","answer key*"],
+    "link":     ["recruit*","vacan*","notific*","apply*","advert*","employment","assistant*","officer*","constable*","clerk*"],
+    "only":     ["only"],
+}
+TERMS_VERSION = hashlib.sha1(json.dumps(TERMS, sort_keys=True).encode()).hexdigest()[:12]
+ACCEPT_BANDS = {"10th pass","12th pass","Any graduate"}
+BLOCK_TAGS = {"teacher","tech","pg","skill"}
 
 OPEN = {"all india","any state","open to all","pan india","indian citizens","across india","from any state","other state candidates","outside state"}
 CLOSE = {"domicile","resident","locals only","local candidates","state quota","only for domicile"}
 
+Classified = namedtuple("Classified", "band blocks update negative link tags")
+
+def _build(terms):
+    """Compile all terms into one trie-shaped alternation scanned once per title.
+    The scan is zero-width at each word start, so overlapping terms are still seen; terms that are a
+    boundary-respecting prefix of a longer match get their tags folded into that match."""
+    kinds={}
+    for tag, words in terms.items():
+        for w in words:
+            prefix=w.endswith("*"); w=w.rstrip("*")
+            k=kinds.setdefault(w, [False, set()]); k[0]|=prefix; k[1].add(tag)
+    trie={}
+    for w,(prefix,_) in kinds.items():
+        node=trie
+        for ch in w: node=node.setdefault(ch, {})
+        node[""]=prefix
+    def emit(node):
+        alts=[re.escape(ch)+emit(child) for ch,child in sorted((k,v) for k,v in node.items() if k)]
+        if "" in node: alts.append("" if node[""] else "(?![a-z0-9])")
+        return alts[0] if len(alts)==1 else "(?:"+"|".join(alts)+")"
+    tags={}
+    for w,(_,own) in kinds.items():
+        acc=set(own)
+        for v,(prefix,other) in kinds.items():
+            if len(v)<len(w) and w.startswith(v) and (prefix or not w[len(v)].isalnum()): acc|=other
+        tags[w]=frozenset(acc)
+    return re.compile(r"(?<![a-z0-9])(?=(" + emit(trie) + "))"), tags
+
+_PAT, _TAGS = _build(TERMS)
+
 def clean(s):
     return re.sub(r"\s+"," ", (s or "").strip())
 
+@lru_cache(maxsize=65536)
+def classify(text):
+    """One linear scan of `text` -> Classified(band, blocks, update, negative, link, tags)."""
+    tags=set()
+    for m in _PAT.finditer((text or "").lower()):
+        tags|=_TAGS[m.group(1)]
+    band = ("10th pass" if "band10" in tags else "12th pass" if "band12" in tags
+            else "Any graduate" if "graduate" in tags else "N/A")
+    return Classified(band, frozenset(tags & BLOCK_TAGS), "update" in tags, "negative" in tags, "link" in tags, frozenset(tags))
+
+def excluded(c, strict=False):
+    """Shared stream policy: teaching posts are always out. Technical/PG terms only pass when the title
+    also states an accepted band and does not say "only" (the scraper's listing pages); with `strict`
+    (collector, eligible()) they are always out, as nursing/ITI/diploma/MBA posts never qualify there."""
+    if "teacher" in c.blocks: return True
+    if c.blocks & {"tech","pg"}: return strict or c.band not in ACCEPT_BANDS or "only" in c.tags
+    return False
+
 def education_band(text):
-    t=(text or "").lower()
-    if any(k in t for k in ["10th","matric","ssc "]): return "10th pass"
-    if any(k in t for k in ["12th","intermediate","hsc"]): return "12th pass"
-    if "any graduate" in t or "any degree" in t or re.search(r"\bgraduate\b", t): return "Any graduate"
-    return "N/A"
+    return classify(text).band
 
 def allow_skills(text):
-    t=(text or "").lower()
-    bad = any(x in t for x in ["steno","shorthand","trade test","cad","sap","oracle","aws","azure","docker","kubernetes","tally erp"])
-    return not bad
+    return "skill" not in classify(text).blocks
 
 def allow_domicile(title):
     t=(title or "").lower()
@@ -31,16 +93,12 @@ def allow_domicile(title):
     return True
 
 def exclude_streams(text):
-    t=(text or "").lower()
-    if any(k in t for k in TEACHER): return True
-    if any(k in t for k in TECH): return True
-    if any(k in t for k in PG): return True
-    return False
+    return excluded(classify(text), strict=True)
 
 def eligible(title):
-    t = clean(title).lower()
-    if exclude_streams(t): return False
-    if not allow_skills(t): return False
+    t = clean(title)
+    c = classify(t)
+    if excluded(c, strict=True): return False
+    if "skill" in c.blocks: return False
     if not allow_domicile(t): return False
-    band = education_band(t)
-    return band in {"10th pass","12th pass","Any graduate"}
+    return c.band in ACCEPT_BANDS
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# frontier.py — bounded crawl frontier for notice boards: pagination and "view all" pages behind each source
+#   python tools/frontier.py               # size and age of the persistent seen set
+#   python tools/frontier.py URL           # links of URL that would be followed, best first
+# Landing pages are the seeds. Links found on a fetched page are queued by priority (pagination / "view
+# all" first, then reopened/extension notices, then vacancy link text), kept on the page's host and
+# limited to MAX_DEPTH hops and PAGES_PER_HOST extra pages per run. A hashed seen set in the shared cache
+# remembers each visited page; a link on a page that has not changed since the last run is skipped while
+# its own last visit is younger than REVISIT. Each crawler keeps its own seen file (the collector uses
+# COLLECTOR_SEEN_PATH), since a page one of them just read is not "unchanged" for the other.
+import os, re, sys, time, heapq, struct, hashlib, pathlib
+from html import unescape
+from urllib.parse import urljoin, urlparse, urldefrag
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.httpclient import CACHE, put
+from tools.eligibility import classify, clean
+
+PAGES_PER_HOST = int(os.getenv("CRAWL_PAGES_PER_HOST", "4"))
+MAX_DEPTH = int(os.getenv("CRAWL_DEPTH", "2"))
+REVISIT = 7*86400              # seen pages are re-read at least weekly even when nothing above them changed
+KEEP = 45*86400                # seen entries not visited for this long are dropped
+SEEN_PATH = CACHE / "frontier_seen.bin"
+COLLECTOR_SEEN_PATH = CACHE / "frontier_seen_collector.bin"
+_REC = struct.Struct("<QII")   # url hash, body hash, last visit (unix seconds)
+
+# link text / href shapes of pagination and listing-index pages
+INDEX_TEXT = re.compile(r"^(?:next|more|older|\d{1,3}|[»›>]+|next\s*[»›>]+|page\s*\d+)$|\b(?:view|see|show)\s*(?:all|more)\b|"
+                        r"\ball\s+(?:notices|opportunities|vacancies|openings|recruitments?|advertisements|jobs)\b|\barchives?\b", re.I)
+INDEX_HREF = re.compile(r"[?&](?:page|pg|p|start|offset)=\d+|/page/\d+|view[-_]?all|archive", re.I)
+SKIP_EXT = re.compile(r"\.(?:pdf|docx?|xlsx?|zip|rar|jpe?g|png|gif|mp4)$", re.I)
+ANCHOR = re.compile(rb"<a\s[^>]*?href\s*=\s*[\"']?([^\"'\s>]+)[^>]*>(.*?)</a>", re.I|re.S)
+TAG = re.compile(r"<[^>]+>")
+
+def host(u):
+    try: return urlparse(u or "").netloc.lower()
+    except Exception: return ""
+
+def url_key(u): return int.from_bytes(hashlib.sha1(u.encode()).digest()[:8], "little")
+def body_key(b): return int.from_bytes(hashlib.sha1(b).digest()[:4], "little")
+
+def anchors(body):
+    """(text, href) of every <a href> in a page body. A regex pass is enough to find follow-up links and
+    costs far less than a second DOM parse of the page."""
+    for m in ANCHOR.finditer(body or b""):
+        yield unescape(TAG.sub(" ", m.group(2).decode("utf-8", "ignore"))), unescape(m.group(1).decode("utf-8", "ignore"))
+
+def priority(text, href):
+    """Lower is fetched first; None means the link is not worth a fetch."""
+    if INDEX_TEXT.search(text) or INDEX_HREF.search(href): return 0
+    c = classify(text)
+    if c.update: return 1
+    if c.link: return 2
+    return None
+
+class Seen:
+    """Persistent hashed URL set: 64-bit URL hash -> (32-bit body hash, last visit), 16 bytes per page."""
+    def __init__(self, path=SEEN_PATH):
+        self.path = pathlib.Path(path); self.map = {}
+        try: raw = self.path.read_bytes()
+        except OSError: raw = b""
+        for k,b,t in _REC.iter_unpack(raw[:len(raw)-len(raw)%_REC.size]):
+            self.map[k] = (b, t)
+
+    def get(self, url): return self.map.get(url_key(url))
+
+    def visit(self, url, body, now=None):
+        """Record a fetch of `url`; True when the body differs from the previous visit (or there was none)."""
+        k, b = url_key(url), body_key(body)
+        old = self.map.get(k)
+        self.map[k] = (b, int(now or time.time()))
+        return old is None or old[0]!=b
+
+    def save(self, now=None):
+        cutoff = (now or time.time())-KEEP
+        try: put(self.path, b"".join(_REC.pack(k,b,t) for k,(b,t) in self.map.items() if t>=cutoff))
+        except OSError: pass
+
+class Frontier:
+    """Priority queue of pages to fetch. Entries are (depth, priority, order), so seeds come out first in
+    the order added and follow-up pages breadth-first, best link first. `item` rides along with each URL
+    (the source dict or parser settings of the page that linked to it)."""
+    def __init__(self, pages_per_host=PAGES_PER_HOST, max_depth=MAX_DEPTH, skip_seen=True, seen=None, now=None):
+        self.pages_per_host = pages_per_host; self.max_depth = max_depth; self.skip_seen = skip_seen
+        self.seen = Seen() if seen is None else seen
+        self.now = now or time.time()
+        self.heap = []; self.queued = set(); self.spent = {}; self.order = 0
+        self.stats = {"queued": 0, "crawled": 0, "fetched": 0, "changed": 0, "skippedSeen": 0, "skippedBudget": 0}
+
+    def exclude(self, urls):
+        """URLs fetched by other means (the seed list) are never queued again."""
+        self.queued.update(urls)
+
+    def add(self, url, depth=0, prio=0, item=None):
+        self.queued.add(url)
+        heapq.heappush(self.heap, (depth, prio, self.order, url, item)); self.order += 1
+
+    def visit(self, url, body):
+        self.stats["fetched"] += 1
+        changed = self.seen.visit(url, body, self.now)
+        if changed: self.stats["changed"] += 1
+        return changed
+
+    def discover(self, body, base, depth, changed, item=None):
+        """Queue the follow-up links of `base` (fetched at `depth`), best first and no more than the host's
+        remaining budget. With skip_seen, links on an unchanged page whose last visit is younger than
+        REVISIT are left alone. Returns the number queued."""
+        h = host(base)
+        room = self.pages_per_host-self.spent.get(h, 0)
+        if depth>=self.max_depth or room<=0: return 0
+        found = []
+        for text, href in anchors(body):
+            url = urldefrag(urljoin(base, href.strip()))[0]
+            if url in self.queued or not url.startswith("http") or host(url)!=h or SKIP_EXT.search(urlparse(url).path): continue
+            p = priority(clean(text), href)
+            if p is None: continue
+            self.queued.add(url)
+            if self.skip_seen and not changed:
+                s = self.seen.get(url)
+                if s and self.now-s[1] < REVISIT:
+                    self.stats["skippedSeen"] += 1; continue
+            found.append((p, len(found), url))
+        best = heapq.nsmallest(room, found)
+        self.stats["skippedBudget"] += len(found)-len(best)
+        for p, _, url in best:
+            self.add(url, depth+1, p, item); self.stats["queued"] += 1
+        return len(best)
+
+    def pop(self):
+        """Next (url, depth, item), or None. Follow-up pages beyond a host's budget are dropped here."""
+        while self.heap:
+            depth, _, _, url, item = heapq.heappop(self.heap)
+            if depth:
+                h = host(url)
+                if self.spent.get(h, 0)>=self.pages_per_host:
+                    self.stats["skippedBudget"] += 1; continue
+                self.spent[h] = self.spent.get(h, 0)+1; self.stats["crawled"] += 1
+            return url, depth, item
+        return None
+
+    def drain(self):
+        out = []
+        while True:
+            nxt = self.pop()
+            if nxt is None: return out
+            out.append(nxt)
+
+if __name__ == "__main__":
+    if len(sys.argv)>1:
+        from tools.httpclient import cached_get
+        f = Frontier(pages_per_host=1<<30, skip_seen=False)
+        f.exclude([sys.argv[1]])
+        f.discover(cached_get(sys.argv[1], timeout=30), sys.argv[1], 0, True)
+        for depth, prio, _, url, _ in sorted(f.heap): print(f"{prio}  {url}")
+    else:
+        now = time.time()
+        for name, path in (("scraper", SEEN_PATH), ("collector", COLLECTOR_SEEN_PATH)):
+            s = Seen(path); ages = sorted(now-t for _,t in s.map.values())
+            print(f"{name}: {len(s.map)} pages seen" + (f", median age {ages[len(ages)//2]/86400:.1f}d, oldest {ages[-1]/86400:.1f}d" if ages else ""))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# httpclient.py — pooled, retrying HTTP client shared by scraper.py and sources/collector.py
+import threading, os, json, time, hashlib, pathlib
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from tools.perf import FETCHES
+
+UA = {"User-Agent":"Mozilla/5.0"}
+MAX_BYTES = 8*1024*1024
+RETRY_AFTER_MAX = 10.0
+
+class CappedRetry(Retry):
+    """Retry that honours Retry-After only up to RETRY_AFTER_MAX seconds, so one server cannot stall a worker."""
+    def get_retry_after(self, response):
+        after = super().get_retry_after(response)
+        return None if after is None else min(after, RETRY_AFTER_MAX)
+
+# Bounded retries with exponential backoff on connect/read errors and 5xx; 4xx fail immediately.
+RETRY = CappedRetry(total=3, connect=2, read=2, status=2, backoff_factor=0.6,
+              status_forcelist=(500,502,503,504), allowed_methods=frozenset({"GET","HEAD"}),
+              raise_on_status=False, respect_retry_after_header=True)
+
+Fetched = namedtuple("Fetched", "url status headers body")
+
+class FetchError(Exception):
+    """Typed fetch failure; `reason` is one of timeout, ssl, connection, http_4xx, http_5xx, too_large, request."""
+    def __init__(self, reason, detail=""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+_SESSIONS = {}
+_LOCK = threading.Lock()
+FAILURES = {}   # url -> reason of the most recent failed fetch in this process
+
+def host(u):
+    try: return urlparse(u or "").netloc.lower()
+    except Exception: return ""
+
+def session_for(url):
+    """One keep-alive Session per host, so several pages on the same site reuse a connection."""
+    h = host(url)
+    with _LOCK:
+        s = _SESSIONS.get(h)
+        if s is None:
+            s = requests.Session(); s.headers.update(UA)
+            ad = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=RETRY)
+            s.mount("http://", ad); s.mount("https://", ad)
+            _SESSIONS[h] = s
+    return s
+
+def _reason(e):
+    if isinstance(e, requests.exceptions.Timeout): return "timeout"
+    if isinstance(e, requests.exceptions.SSLError): return "ssl"
+    if isinstance(e, requests.exceptions.RetryError): return "http_5xx"
+    if isinstance(e, requests.exceptions.ConnectionError): return "connection"
+    return "request"
+
+def fetch(url, timeout=20, headers=None, max_bytes=MAX_BYTES):
+    """GET `url` through the host's pooled session. Returns Fetched (a 304 comes back with an empty
+    body); raises FetchError and records the reason in FAILURES on any failure. Every attempt is also
+    logged to perf.FETCHES."""
+    t0 = time.perf_counter()
+    try:
+        try:
+            r = session_for(url).get(url, headers=headers, timeout=timeout, stream=True)
+        except requests.RequestException as e:
+            raise FetchError(_reason(e), str(e)[:200])
+        with r:
+            if r.status_code>=400:
+                raise FetchError("http_5xx" if r.status_code>=500 else "http_4xx", str(r.status_code))
+            cl = r.headers.get("Content-Length")
+            if cl and cl.isdigit() and int(cl)>max_bytes:
+                raise FetchError("too_large", cl)
+            buf = bytearray()
+            try:
+                for chunk in r.iter_content(65536):
+                    buf += chunk
+                    if len(buf)>max_bytes: raise FetchError("too_large", f">{max_bytes}")
+            except requests.RequestException as e:
+                raise FetchError(_reason(e), str(e)[:200])
+            FAILURES.pop(url, None)
+            FETCHES.append((url, r.status_code, len(buf), time.perf_counter()-t0, None))
+            return Fetched(r.url, r.status_code, r.headers, bytes(buf))
+    except FetchError as e:
+        FAILURES[url] = e.reason
+        FETCHES.append((url, None, 0, time.perf_counter()-t0, e.reason))
+        raise
+
+# ---------------- Shared page cache ----------------
+# Body in .cache/<sha1>.html, validators and fetch metadata in .cache/<sha1>.json; every stage of a
+# pipeline run reads and writes the same store. An entry already fetched or revalidated during the
+# current run (same FETCH_RUN_ID, or within FETCH_RUN_WINDOW seconds when no run id is set) is served
+# without touching the network; older entries are revalidated with If-None-Match/If-Modified-Since.
+CACHE = pathlib.Path(os.getenv("FETCH_CACHE", ".cache"))
+RUN_ID = os.getenv("FETCH_RUN_ID", "")
+RUN_WINDOW = float(os.getenv("FETCH_RUN_WINDOW", "1800"))
+
+def ck(u): return CACHE / (hashlib.sha1(u.encode()).hexdigest()+".html")
+def mk(u): return ck(u).with_suffix(".json")
+
+def put(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data); os.replace(tmp, path)
+
+def load_meta(u):
+    try: return json.loads(mk(u).read_text(encoding="utf-8"))
+    except Exception: return {}
+
+def fresh_this_run(meta):
+    if RUN_ID: return meta.get("runId")==RUN_ID
+    return time.time()-meta.get("checkedTs", 0) < RUN_WINDOW
+
+def cached_get(u, ttl=0, timeout=20, max_bytes=MAX_BYTES):
+    """Body of `u` via the shared cache (b"" on failure). `ttl` > 0 also accepts entries younger than ttl."""
+    f = ck(u)
+    if not f.exists():
+        meta = {}
+    else:
+        if ttl>0 and time.time()-f.stat().st_mtime < ttl: return f.read_bytes()
+        meta = load_meta(u)
+        if fresh_this_run(meta): return f.read_bytes()
+    hdr = {}
+    if meta.get("etag"): hdr["If-None-Match"] = meta["etag"]
+    if meta.get("lastModified"): hdr["If-Modified-Since"] = meta["lastModified"]
+    now = datetime.utcnow().isoformat()+"Z"; stamp = {"checkedAt": now, "checkedTs": time.time(), "runId": RUN_ID}
+    try:
+        r = fetch(u, timeout=timeout, headers=hdr, max_bytes=max_bytes)
+        if r.status==304 and f.exists():
+            body = f.read_bytes(); f.touch()
+            meta.update({"status": 304, **stamp})
+            put(mk(u), json.dumps(meta).encode())
+            return body
+        if not 200<=r.status<300: return b""
+        put(f, r.body)
+        meta = {"url": u, "status": r.status, "etag": r.headers.get("ETag"), "lastModified": r.headers.get("Last-Modified"),
+                "contentType": r.headers.get("Content-Type"), "bytes": len(r.body), "fetchedAt": now, **stamp}
+        put(mk(u), json.dumps(meta).encode())
+        return r.body
+    except (FetchError, OSError):
+        return b""
+
+def failure_counts():
+    out = {}
+    for reason in FAILURES.values(): out[reason] = out.get(reason, 0)+1
+    return out
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# neardup.py — near-duplicate clustering of listings across sources (MinHash + LSH over titles)
+#   python tools/neardup.py data.json     # print the clusters found in jobListings
+# Used by scraper.py and sources/collector.py to collapse the same notice seen on several sites.
+# A title-similarity (LSH) match alone only merges titles with the same words; anything looser needs
+# identity evidence (advt no., PDF stem or canonical URL). Listings from one source page never merge.
+import re, sys, json, struct, hashlib, pathlib
+from functools import lru_cache
+from urllib.parse import urlparse
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.schema_merge import canonical_url
+
+NUM_PERM = 32
+BANDS, ROWS = 8, 4             # LSH candidate threshold ~ (1/8)**(1/4) ~ 0.6 Jaccard
+JACCARD_MIN = 0.6              # verified similarity for a title-only match
+FEATURE_MIN = 0.3              # weaker title similarity accepted when advt no. / PDF stem agree
+SHINGLE = 4
+MAX_REPS = 8
+_UNPACK = struct.Struct(f"<{NUM_PERM}I").unpack
+
+# boilerplate aggregators add around the same notice title
+NOISE = re.compile(r"\b(online\s*form|apply\s*online|recruitment|notification|vacancy|vacancies|out|new|latest|"
+                   r"advt|advertisement|no|for|the|of|post|posts)\b")
+ADVT = re.compile(r"\b(?:advt|advertisement|cen|notification)\.?\s*(?:no\.?)?\s*[:\-]?\s*(\d{1,3})\s*[/\-]\s*(\d{2,4})\b", re.I)
+DIGITS = re.compile(r"\d+")
+
+def norm(title):
+    t=re.sub(r"\d[\d,]*\s*posts?\b"," ",(title or "").lower())
+    t=re.sub(r"[^a-z0-9]+"," ",t)
+    return re.sub(r"\s+"," ",NOISE.sub(" ",t)).strip()
+
+def shingles(title):
+    t=norm(title).replace(" ","")
+    if len(t)<=SHINGLE: return {t} if t else set()
+    return {t[i:i+SHINGLE] for i in range(len(t)-SHINGLE+1)}
+
+@lru_cache(maxsize=1<<16)
+def _hashes(s):
+    # NUM_PERM independent 32-bit hashes of one shingle from a single XOF call
+    return _UNPACK(hashlib.shake_128(s.encode()).digest(4*NUM_PERM))
+
+def minhash(sh):
+    if not sh: return ()
+    return tuple(map(min, zip(*map(_hashes, sh))))
+
+def advt_no(title):
+    m=ADVT.search(title or "")
+    return f"{int(m.group(1))}/{m.group(2)[-2:]}" if m else None
+
+def pdf_stem(j):
+    for f in ("applyLink","detailLink"):
+        p=urlparse(j.get(f) or "").path.lower()
+        if p.endswith(".pdf"):
+            stem=p.rsplit("/",1)[-1][:-4]
+            # generic names ("notification.pdf") say nothing about identity
+            if len(stem)>=8 and any(ch.isdigit() for ch in stem): return stem
+    return None
+
+def source_page(j):
+    return (j.get("meta") or {}).get("sourceUrl")
+
+def identity(j):
+    """(advt no., PDF stem, canonical URL) of a listing; equal non-empty fields identify the same notice."""
+    return advt_no(j.get("title")), pdf_stem(j), canonical_url(j.get("detailLink") or j.get("applyLink")) or None
+
+def same_identity(a, b):
+    return any(x and x==y for x,y in zip(a, b))
+
+def digits_agree(da, db):
+    """Numbers in titles (years, advt/post counts) must not contradict: one side may add numbers the
+    other omits, but "CEN 01/2025" and "CEN 02/2025" never merge."""
+    return not (da-db and db-da)
+
+def jaccard(a, b):
+    return len(a&b)/len(a|b) if a and b else 0.0
+
+def clusters(items, page=source_page):
+    """Group near-duplicate listings. Returns a list of index lists (singletons included), each in input order.
+    Candidates come from LSH buckets on title MinHash plus exact advt-number / PDF-stem / URL buckets,
+    so the work is near-linear in len(items); every candidate pair is verified before merging. A cluster
+    never holds two listings with the same `page(item)` (one source page lists distinct notices)."""
+    n=len(items)
+    sh=[shingles(j.get("title")) for j in items]
+    words=[frozenset(norm(j.get("title")).split()) for j in items]
+    dg=[set(DIGITS.findall(j.get("title") or "")) for j in items]
+    ids=[identity(j) for j in items]
+    buckets={}
+    for i,j in enumerate(items):
+        sig=minhash(sh[i])
+        for b in range(BANDS if sig else 0):
+            buckets.setdefault(("lsh",b)+sig[b*ROWS:(b+1)*ROWS], []).append(i)
+        for kind,v in zip(("advt","pdf","url"), ids[i]):
+            if v: buckets.setdefault((kind,v), []).append(i)
+    parent=list(range(n))
+    pages=[{page(j)}-{None} for j in items]
+    def find(x):
+        while parent[x]!=x:
+            parent[x]=parent[parent[x]]; x=parent[x]
+        return x
+    def related(key, i, k):
+        if not digits_agree(dg[i],dg[k]): return False
+        if key[0]!="lsh": return jaccard(sh[i],sh[k])>=FEATURE_MIN
+        # "UP Police Constable" vs "MP Police Constable" are close by shingles but name different
+        # vacancies: a similarity-only match must not differ by a word unless the identity agrees
+        return jaccard(sh[i],sh[k])>=JACCARD_MIN and (words[i]==words[k] or same_identity(ids[i],ids[k]))
+    for key, members in buckets.items():
+        if len(members)<2: continue
+        # each member is checked against the most recent unmerged members of its bucket only, which
+        # bounds the work on crowded buckets (many near-identical boilerplate titles) to O(n*MAX_REPS)
+        reps=[]
+        for k in members:
+            for i in reps[-MAX_REPS:]:
+                ri,rk=find(i),find(k)
+                if ri==rk: break
+                if pages[ri] & pages[rk]: continue
+                if related(key, i, k):
+                    lo,hi=min(ri,rk),max(ri,rk)
+                    parent[hi]=lo; pages[lo]|=pages[hi]; break
+            else:
+                reps.append(k)
+    groups={}
+    for i in range(n): groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+def collapse(items, rank, page=source_page):
+    """Keep the best member of each cluster by `rank(item)` (higher wins, ties keep input order) and
+    record the others on it as corroboration. Returns the kept items in input order."""
+    out=[]
+    for g in clusters(items, page):
+        best=max(g, key=lambda i:(rank(items[i]), -i))
+        keep=items[best]
+        if len(g)>1:
+            fl=keep.setdefault("flags",{})
+            fl["corroborated"]=True
+            also=fl.setdefault("alsoAt",[])
+            for i in g:
+                link=items[i].get("detailLink") or items[i].get("applyLink")
+                if i!=best and link and link not in also and link!=(keep.get("detailLink") or keep.get("applyLink")):
+                    also.append(link)
+            if not also: fl.pop("alsoAt")
+        out.append((best, keep))
+    return [j for _,j in sorted(out, key=lambda x:x[0])]
+
+if __name__=="__main__":
+    data=json.load(open(sys.argv[1] if len(sys.argv)>1 else "data.json", encoding="utf-8"))
+    items=data.get("jobListings") or []
+    groups=[g for g in clusters(items) if len(g)>1]
+    for g in groups:
+        print(" | ".join(items[i].get("title","") for i in g))
+    print(f"{len(items)} listings, {len(groups)} clusters, {sum(len(g)-1 for g in groups)} duplicates")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# pdf_enrich.py — fill deadline / numberOfPosts of PDF notices from their first pages
+#   python tools/pdf_enrich.py [data.json] [out.json]
+# Only listings whose link is a PDF and that still lack a deadline or post count are read. Bodies come
+# through the shared page cache (conditional GET, PDF_TTL without any request at all) and extraction
+# results are cached by content hash, so an unchanged notice is neither re-downloaded nor re-parsed.
+# Work stops at the per-run byte and time budgets; pdfplumber is optional (no-op without it).
+import os, sys, io, re, json, time, hashlib, pathlib, logging, multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.httpclient import cached_get, CACHE, put
+from tools import dates
+try:
+    import pdfplumber
+except Exception:
+    pdfplumber = None
+
+MAX_PAGES = 3
+PDF_TTL = 7*86400                                    # notices rarely change; revalidate weekly
+PDF_MAX_BYTES = 25*1024*1024
+BUDGET_BYTES = int(os.getenv("PDF_BUDGET_BYTES", str(64*1024*1024)))
+BUDGET_SECONDS = float(os.getenv("PDF_BUDGET_SECONDS", "300"))
+WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_VERSION = "2"
+RESULTS = CACHE / "pdf"
+
+LAST_DATE = re.compile(r"(?:last|closing|end)\s*date[^0-9\n]{0,80}?(" + dates.PATTERN + ")", re.I)
+NUM = r"(\d{1,3}(?:,\d{2,3})+|\d{1,6})"
+POSTS = re.compile(r"(?:total\s*(?:no\.?\s*of\s*)?(?:posts?|vacanc(?:y|ies))\s*[:\-]?\s*"+NUM+")|(?:"+NUM+r"\s*(?:posts?|vacanc(?:y|ies))\b)", re.I)
+
+def scan_text(text, found):
+    """Fold one page of text into `found` ({"lastDate", "posts"}); first hit of each wins."""
+    if "lastDate" not in found:
+        for m in LAST_DATE.finditer(text):
+            d = dates.normalize(m.group(1), fallback=False)
+            if d: found["lastDate"] = d; break
+    if "posts" not in found:
+        for m in POSTS.finditer(text):
+            n = int((m.group(1) or m.group(2)).replace(",",""))
+            if 0<n<1000000: found["posts"] = n; break
+    return found
+
+def extract(body):
+    """Read at most MAX_PAGES pages, stopping as soon as both fields are found. Runs in a worker process."""
+    found = {}; pages = 0
+    with pdfplumber.open(io.BytesIO(body)) as pdf:
+        for page in pdf.pages[:MAX_PAGES]:
+            pages += 1
+            scan_text(page.extract_text() or "", found)
+            if "lastDate" in found and "posts" in found: break
+    return {**found, "pages": pages}
+
+def is_pdf(u):
+    return (u or "").lower().split("?",1)[0].split("#",1)[0].endswith(".pdf")
+
+def pdf_link(j):
+    for f in ("applyLink","detailLink","pdfLink"):
+        if is_pdf(j.get(f)): return j[f]
+    return None
+
+def wants(j):
+    return pdf_link(j) and ((j.get("deadline") or "N/A")=="N/A" or not j.get("numberOfPosts"))
+
+def result_path(digest): return RESULTS / f"{digest}.json"
+
+def load_result(digest):
+    try:
+        r = json.loads(result_path(digest).read_text(encoding="utf-8"))
+        return r if r.get("v")==EXTRACT_VERSION else None
+    except Exception:
+        return None
+
+def apply(j, r):
+    changed = False
+    if (j.get("deadline") or "N/A")=="N/A" and r.get("lastDate"):
+        j["deadline"] = r["lastDate"]; j.setdefault("flags",{})["deadlineFrom"] = "pdf"; changed = True
+    if not j.get("numberOfPosts") and r.get("posts"):
+        j["numberOfPosts"] = r["posts"]; j.setdefault("flags",{})["postsFrom"] = "pdf"; changed = True
+    return changed
+
+def stop(pool, pending):
+    """Shut `pool` down without waiting; queued extracts are cancelled and, when some are still pending
+    past the budget, the running ones are killed."""
+    # shutdown(wait=False) does not stop a running task, and its worker would still be joined at interpreter
+    # exit, i.e. the wait the budget rules out. Before Python 3.14 (terminate_workers) the only handle on the
+    # workers is the private _processes map, which shutdown() clears, so it is read first and guarded.
+    procs = list((getattr(pool, "_processes", None) or {}).values()) if pending else []
+    pool.shutdown(wait=False, cancel_futures=True)
+    for p in procs: p.terminate()
+
+def enrich(listings, budget_bytes=BUDGET_BYTES, budget_seconds=BUDGET_SECONDS, workers=WORKERS):
+    """Fill missing deadline/posts of PDF listings in place. Returns stats for transparencyInfo."""
+    stats = {"candidates": 0, "cached": 0, "parsed": 0, "enriched": 0, "bytes": 0, "skippedBudget": 0, "errors": 0}
+    if pdfplumber is None:
+        stats["disabled"] = "pdfplumber not installed"; return stats
+    by_url = {}
+    for j in listings:
+        if wants(j): by_url.setdefault(pdf_link(j), []).append(j)
+    # listings without any deadline first: those are the ones the expiry logic cannot handle
+    urls = sorted(by_url, key=lambda u: min(0 if (j.get("deadline") or "N/A")=="N/A" else 1 for j in by_url[u]))
+    stats["candidates"] = len(urls)
+    t0 = time.time(); pending = {}
+    def over(): return stats["bytes"]>=budget_bytes or time.time()-t0>=budget_seconds
+    # forkserver workers: the download threads below are already running when the first extract starts
+    cpu_pool = ProcessPoolExecutor(max(1, workers), mp_context=multiprocessing.get_context("forkserver"))
+    try:
+        with ThreadPoolExecutor(4) as io_pool:
+            fetches = {}
+            it = iter(urls)
+            def submit_next():
+                for u in it:
+                    if over(): stats["skippedBudget"] += 1; continue
+                    fetches[io_pool.submit(cached_get, u, PDF_TTL, 30, PDF_MAX_BYTES)] = u; return
+            for _ in range(4): submit_next()
+            while fetches:
+                fut = next(as_completed(fetches)); u = fetches.pop(fut)
+                body = fut.result()
+                submit_next()
+                if not body.startswith(b"%PDF"):
+                    stats["errors"] += 1; continue
+                digest = hashlib.sha256(body).hexdigest()
+                r = load_result(digest)
+                if r is not None:
+                    stats["cached"] += 1
+                    stats["enriched"] += sum(apply(j, r) for j in by_url[u]); continue
+                stats["bytes"] += len(body)
+                pending[cpu_pool.submit(extract, body)] = (u, digest)
+        for fut in as_completed(pending, timeout=max(1.0, budget_seconds-(time.time()-t0))):
+            u, digest = pending.pop(fut)
+            try: r = {**fut.result(), "v": EXTRACT_VERSION, "url": u}
+            except Exception as e:
+                stats["errors"] += 1; logging.info("pdf: %s: %s", u, e); continue
+            put(result_path(digest), json.dumps(r).encode())
+            stats["parsed"] += 1
+            stats["enriched"] += sum(apply(j, r) for j in by_url[u])
+    except TimeoutError:
+        stats["skippedBudget"] += len(pending)
+    finally:
+        stop(cpu_pool, pending)
+    return stats
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv)>1 else "data.json"
+    out = sys.argv[2] if len(sys.argv)>2 else src
+    data = json.load(open(src,"r",encoding="utf-8"))
+    stats = enrich(data.get("jobListings") or [])
+    json.dump(data, open(out,"w",encoding="utf-8"), ensure_ascii=False, separators=(",",":"))
+    print(json.dumps(stats))
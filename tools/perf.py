@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# perf.py — per-stage timing/resource records shared by every pipeline script
+#   python tools/perf.py [--runs 10]    # slowest stages and hosts over the recent perf_history.jsonl
+# A script calls stage("name") once; at exit its wall/CPU time, peak RSS and the fetches made through
+# tools.httpclient are appended to the run file, folded into health.json["perf"] and perf_history.jsonl.
+# A stage that fails (fail() before a non-zero exit, or an uncaught exception) only leaves its run-file
+# record: health.json and the history describe runs that published.
+import os, sys, json, time, atexit, resource, pathlib, contextlib
+from urllib.parse import urlparse
+
+RUN_FILE = pathlib.Path(os.getenv("PERF_RUN_FILE", "tmp/perf_run.jsonl"))
+HISTORY = pathlib.Path(os.getenv("PERF_HISTORY", "perf_history.jsonl"))
+HEALTH = pathlib.Path("health.json")
+RUN_ID = os.getenv("FETCH_RUN_ID", "")
+RUN_WINDOW = float(os.getenv("FETCH_RUN_WINDOW", "1800"))
+HISTORY_KEEP = 2000            # stage records kept in perf_history.jsonl
+TOP = 10
+
+FETCHES = []   # (url, status, bytes, seconds, error) appended by tools.httpclient.fetch
+
+def host(u):
+    try: return urlparse(u or "").netloc.lower()
+    except Exception: return ""
+
+def cpu_seconds():
+    s, c = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return s.ru_utime+s.ru_stime+c.ru_utime+c.ru_stime
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux; children covers process-pool workers
+    return round(max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                     resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)/1024, 1)
+
+def by_host(fetches):
+    out = {}
+    for u,status,nbytes,sec,err in fetches:
+        h = out.setdefault(host(u), {"host": host(u), "fetches": 0, "seconds": 0.0, "bytes": 0, "errors": 0})
+        h["fetches"] += 1; h["seconds"] = round(h["seconds"]+sec, 3); h["bytes"] += nbytes or 0
+        if err: h["errors"] += 1
+    return sorted(out.values(), key=lambda h: -h["seconds"])
+
+class Stage:
+    def __init__(self, name):
+        self.name = name; self.t0 = time.time(); self.c0 = cpu_seconds(); self.phases = {}; self.done = False
+        self.failed = False
+
+    def phase(self, name):
+        """Context manager adding the wall time of a block to this stage's phases."""
+        st = self
+        class _P:
+            def __enter__(self): self.t = time.perf_counter()
+            def __exit__(self, *a): st.phases[name] = round(st.phases.get(name, 0)+time.perf_counter()-self.t, 3)
+        return _P()
+
+    def record(self):
+        fetches = list(FETCHES)
+        return {
+            "runId": RUN_ID, "stage": self.name, "ts": round(self.t0, 3),
+            "wall": round(time.time()-self.t0, 3), "cpu": round(cpu_seconds()-self.c0, 3), "maxRssMb": peak_rss_mb(),
+            "phases": self.phases, "fetches": len(fetches), "fetchSeconds": round(sum(f[3] for f in fetches), 3),
+            "hosts": by_host(fetches)[:TOP],
+            "slowest": [{"url":u, "status":s, "bytes":b, "seconds":round(t,3), "error":e}
+                        for u,s,b,t,e in sorted(fetches, key=lambda f: -f[3])[:TOP]],
+        }
+
+    def fail(self):
+        """Mark the stage failed; call before exiting non-zero."""
+        self.failed = True
+
+    def finish(self):
+        if self.done: return
+        self.done = True
+        try:
+            rec = self.record()
+            if self.failed:
+                append(RUN_FILE, {**rec, "failed": True}); return
+            append(RUN_FILE, rec)
+            append(HISTORY, {k:v for k,v in rec.items() if k!="slowest"}, keep=HISTORY_KEEP)
+            update_health(current_run())
+        except Exception as e:
+            print(f"perf: {e}", file=sys.stderr)
+
+_STAGE = None
+
+def stage(name):
+    """Start timing this process as pipeline stage `name`; the record is written at exit."""
+    global _STAGE
+    _STAGE = Stage(name)
+    atexit.register(_STAGE.finish)
+    hook = sys.excepthook
+    def failed(*exc):
+        _STAGE.fail(); hook(*exc)
+    sys.excepthook = failed
+    return _STAGE
+
+def fail():
+    """Mark the current stage failed (no-op when no stage was started)."""
+    if _STAGE: _STAGE.fail()
+
+def phase(name):
+    """Time a block into the current stage's phases (no-op when no stage was started)."""
+    return _STAGE.phase(name) if _STAGE else contextlib.nullcontext()
+
+def append(path, rec, keep=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f: f.write(json.dumps(rec, ensure_ascii=False)+"\n")
+    if keep and path.stat().st_size > keep*2048:
+        lines = path.read_text(encoding="utf-8").splitlines()[-keep:]
+        tmp = path.with_name(path.name+".tmp"); tmp.write_text("\n".join(lines)+"\n", encoding="utf-8"); os.replace(tmp, path)
+
+def read_jsonl(path):
+    try: lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError: return []
+    out = []
+    for line in lines:
+        try: out.append(json.loads(line))
+        except ValueError: pass
+    return out
+
+def current_run():
+    recs = read_jsonl(RUN_FILE)
+    recs = [r for r in recs if not r.get("failed")]
+    if RUN_ID: return [r for r in recs if r.get("runId")==RUN_ID]
+    return [r for r in recs if time.time()-r.get("ts", 0) < RUN_WINDOW]
+
+def update_health(recs):
+    try: h = json.loads(HEALTH.read_text(encoding="utf-8"))
+    except Exception: h = {}
+    hosts = {}
+    for r in recs:
+        for x in r.get("hosts") or []:
+            a = hosts.setdefault(x["host"], {"host": x["host"], "fetches": 0, "seconds": 0.0, "bytes": 0, "errors": 0})
+            for k in ("fetches","bytes","errors"): a[k] += x[k]
+            a["seconds"] = round(a["seconds"]+x["seconds"], 3)
+    h["perf"] = {
+        "runId": RUN_ID or None,
+        "stages": [{k:r.get(k) for k in ("stage","wall","cpu","maxRssMb","fetches","fetchSeconds","phases")} for r in recs],
+        "totalWall": round(sum(r.get("wall", 0) for r in recs), 3),
+        "hosts": sorted(hosts.values(), key=lambda x: -x["seconds"])[:TOP],
+        "slowest": sorted((x for r in recs for x in r.get("slowest") or []), key=lambda x: -x["seconds"])[:TOP],
+    }
+    tmp = HEALTH.with_name(HEALTH.name+".tmp")
+    tmp.write_text(json.dumps(h, indent=2, ensure_ascii=False), encoding="utf-8"); os.replace(tmp, HEALTH)
+
+def report(runs=10):
+    recs = read_jsonl(HISTORY)
+    ids = []
+    for r in recs:
+        rid = r.get("runId") or f"ts:{int(r.get('ts', 0)//RUN_WINDOW)}"
+        if rid not in ids: ids.append(rid)
+    keep = set(ids[-runs:])
+    recs = [r for r in recs if (r.get("runId") or f"ts:{int(r.get('ts', 0)//RUN_WINDOW)}") in keep]
+    stages, hosts = {}, {}
+    for r in recs:
+        s = stages.setdefault(r["stage"], {"n":0, "wall":0.0, "cpu":0.0, "rss":0.0})
+        s["n"] += 1; s["wall"] += r.get("wall", 0); s["cpu"] += r.get("cpu", 0); s["rss"] = max(s["rss"], r.get("maxRssMb", 0))
+        for x in r.get("hosts") or []:
+            a = hosts.setdefault(x["host"], {"fetches":0, "seconds":0.0, "bytes":0, "errors":0})
+            for k in ("fetches","seconds","bytes","errors"): a[k] += x[k]
+    print(f"last {len(keep)} runs")
+    print(f"{'stage':<16}{'runs':>5}{'mean wall s':>13}{'mean cpu s':>12}{'peak MB':>9}")
+    for name,s in sorted(stages.items(), key=lambda kv: -kv[1]["wall"]/kv[1]["n"]):
+        print(f"{name:<16}{s['n']:>5}{s['wall']/s['n']:>13.2f}{s['cpu']/s['n']:>12.2f}{s['rss']:>9.1f}")
+    print(f"\n{'host':<40}{'fetches':>8}{'total s':>9}{'mean s':>8}{'MB':>8}{'errors':>7}")
+    for name,a in sorted(hosts.items(), key=lambda kv: -kv[1]["seconds"])[:TOP]:
+        print(f"{name[:39]:<40}{a['fetches']:>8}{a['seconds']:>9.1f}{a['seconds']/max(a['fetches'],1):>8.2f}{a['bytes']/2**20:>8.2f}{a['errors']:>7}")
+
+if __name__ == "__main__":
+    report(int(sys.argv[sys.argv.index("--runs")+1]) if "--runs" in sys.argv else 10)
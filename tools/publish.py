@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# publish.py — compact, content-addressed build of data.json for the static dashboard
+#   python tools/publish.py [data.json] [outdir]
+# Writes minified data.json, data/<shard>.<hash>.json (+ .gz/.br siblings) and manifest.json.
+import json, gzip, hashlib, os, sys, pathlib
+from datetime import datetime
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.schema_merge import Raw
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+SHARD_DIR = "data"
+
+def dumps_min(obj):
+    """Minified JSON. Raw members of a top-level object (e.g. the archive exported by tools/store.py) are
+    already minified JSON text and are copied in as-is."""
+    if isinstance(obj, dict) and any(isinstance(v, Raw) for v in obj.values()):
+        return b"{"+b",".join(dumps_min(k)+b":"+(v.encode("utf-8") if isinstance(v, Raw) else dumps_min(v)) for k,v in obj.items())+b"}"
+    return json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+
+def write_atomic(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name+".tmp")
+    tmp.write_bytes(body); os.replace(tmp, path)
+
+def write_shard(outdir, name, obj):
+    body = dumps_min(obj)
+    digest = hashlib.sha256(body).hexdigest()
+    rel = f"{SHARD_DIR}/{name}.{digest[:16]}.json"
+    p = outdir / rel
+    gzp = p.with_name(p.name+".gz")
+    # an unchanged shard (usually the archive) is already on disk with its compressed siblings
+    if p.exists() and gzp.exists():
+        return {"path": rel, "sha256": digest, "bytes": len(body), "gzipBytes": gzp.stat().st_size}
+    gz = gzip.compress(body, 9, mtime=0)
+    write_atomic(p, body)
+    write_atomic(gzp, gz)
+    if brotli is not None:
+        write_atomic(p.with_name(p.name+".br"), brotli.compress(body, quality=11))
+    return {"path": rel, "sha256": digest, "bytes": len(body), "gzipBytes": len(gz)}
+
+def load_manifest(outdir):
+    try: return json.loads((outdir/"manifest.json").read_text(encoding="utf-8"))
+    except Exception: return {}
+
+def prune(outdir, keep):
+    d = outdir / SHARD_DIR
+    if not d.exists(): return
+    for f in d.iterdir():
+        base = f.name
+        for ext in (".gz",".br"):
+            if base.endswith(ext): base = base[:-len(ext)]
+        if f"{SHARD_DIR}/{base}" not in keep: f.unlink()
+
+def publish(data, outdir="."):
+    """Write the full document plus content-addressed shards. The active shard (listings, sections,
+    transparency) is what the dashboard loads; the archive shard is only fetched by tools that need it.
+    Shards from the previous manifest are kept so clients holding it can still resolve them."""
+    outdir = pathlib.Path(outdir)
+    prev = load_manifest(outdir)
+    active = {k:v for k,v in data.items() if k!="archivedListings"}
+    shards = {
+        "active": write_shard(outdir, "active", active),
+        "archive": write_shard(outdir, "archive", {"archivedListings": data.get("archivedListings") or Raw("[]")}),
+    }
+    manifest = {
+        "generatedAt": datetime.utcnow().isoformat()+"Z",
+        "lastUpdated": (data.get("transparencyInfo") or {}).get("lastUpdated"),
+        "shards": shards,
+    }
+    write_atomic(outdir/"data.json", dumps_min(data))
+    write_atomic(outdir/"manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    keep = {s["path"] for s in shards.values()} | {s.get("path") for s in (prev.get("shards") or {}).values()}
+    prune(outdir, keep)
+    return manifest
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv)>1 else "data.json"
+    out = sys.argv[2] if len(sys.argv)>2 else "."
+    m = publish(json.load(open(src,"r",encoding="utf-8")), out)
+    print(json.dumps({k:{"path":v["path"],"bytes":v["bytes"],"gzipBytes":v["gzipBytes"]} for k,v in m["shards"].items()}))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# schedule.py — adaptive per-source scheduling from historical yield, change frequency, failures and latency
+#   python tools/schedule.py [--mode nightly]   # print the plan for the current rules.json
+import json, math, time, pathlib, sys
+from urllib.parse import urlparse
+
+STATS_PATH = "source_stats.json"
+ALPHA = 0.3                    # EWMA weight of the newest observation
+DEFAULT_CHANGE = 86400         # assumed change interval until a source has changed twice
+MIN_POLL = {"light": 6*3600, "nightly": 12*3600, "weekly": 0}
+MAX_POLL = 7*86400             # every source is polled at least weekly
+FAIL_CUTOFF = 0.8              # sources failing this often are left to weekly runs
+SLACK = 1800                   # lastOk is stamped mid-run and cron starts drift; a poll this early still counts as due
+
+def ewma(old, new):
+    return new if old is None else (1-ALPHA)*old + ALPHA*new
+
+def load_stats(path=STATS_PATH, health="health.json"):
+    try:
+        st = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+        if isinstance(st, dict): return st
+    except Exception:
+        pass
+    # bootstrap per-host yields from the last health.json so the first run is not blind
+    st = {"_hostSeed": {}}
+    try:
+        h = json.loads(pathlib.Path(health).read_text(encoding="utf-8"))
+        for row in h.get("sourcesByStatus") or []:
+            st["_hostSeed"][row.get("host")] = row.get("items", 0)
+    except Exception:
+        pass
+    return st
+
+def save_stats(st, path=STATS_PATH):
+    pathlib.Path(path).write_text(json.dumps(st, indent=2, sort_keys=True), encoding="utf-8")
+
+def record(st, url, ok, latency, items, body_hash=None, now=None):
+    """Fold one poll of `url` into its stats."""
+    now = now or time.time()
+    s = st.setdefault(url, {"polls": 0})
+    s["polls"] = s.get("polls", 0)+1
+    s["lastPolled"] = now
+    s["failRate"] = round(ewma(s.get("failRate"), 0.0 if ok else 1.0), 4)
+    s["latency"] = round(ewma(s.get("latency"), latency), 3)
+    if not ok: return s
+    s["lastOk"] = now
+    s["yield"] = round(ewma(s.get("yield"), items), 3)
+    if body_hash and body_hash!=s.get("hash"):
+        if s.get("hash") and s.get("lastChanged"):
+            s["changeInterval"] = round(ewma(s.get("changeInterval"), now-s["lastChanged"]))
+        s["hash"] = body_hash; s["lastChanged"] = now
+    return s
+
+def change_interval(s, now):
+    """Observed mean time between changes, stretched by how long the page has now gone unchanged."""
+    ci = s.get("changeInterval") or DEFAULT_CHANGE
+    if s.get("lastChanged"): ci = max(ci, now-s["lastChanged"])
+    return ci
+
+def expected_value(s, st, url, now):
+    """Items we expect to gain per second of fetch time if `url` is polled now."""
+    if "yield" in s: y = s["yield"]
+    else: y = (st.get("_hostSeed") or {}).get(urlparse(url).netloc.lower(), 1.0)
+    age = now-(s.get("lastOk") or 0)
+    p_changed = 1-math.exp(-age/change_interval(s, now))
+    return (y+0.5) * (1-s.get("failRate", 0.0)) * p_changed / (s.get("latency", 1.0)+0.5)
+
+def due(s, mode, now):
+    if mode=="weekly" or not s.get("lastPolled"): return True
+    if s.get("polls", 0)>=3 and s.get("failRate", 0.0)>=FAIL_CUTOFF: return False
+    if not s.get("lastOk"): return True
+    age = now-s["lastOk"]
+    interval = min(MAX_POLL, max(MIN_POLL.get(mode, 0), change_interval(s, now)/2))
+    return age>=interval-SLACK
+
+def plan(sources, st, mode, now=None, allow_skip=True):
+    """Order `sources` (dicts with "url") by expected value; with allow_skip, sources that are not
+    due in this mode are returned separately instead of being polled."""
+    now = now or time.time()
+    run, skipped = [], []
+    for i,src in enumerate(sources):
+        s = st.get(src["url"]) or {}
+        if allow_skip and not due(s, mode, now): skipped.append(src); continue
+        run.append((-expected_value(s, st, src["url"], now), i, src))
+    run.sort(key=lambda x: (x[0], x[1]))
+    return [src for _,_,src in run], skipped
+
+if __name__ == "__main__":
+    mode = sys.argv[sys.argv.index("--mode")+1] if "--mode" in sys.argv else "nightly"
+    rules = json.loads(pathlib.Path("rules.json").read_text(encoding="utf-8"))
+    srcs = [{"url":u} for u in rules.get("captureHints", [])]
+    st = load_stats(); now = time.time()
+    run, skipped = plan(srcs, st, mode, now)
+    for s in run: print(f"{expected_value(st.get(s['url']) or {}, st, s['url'], now):8.3f}  {s['url']}")
+    for s in skipped: print(f"    skip  {s['url']}")
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 # schema_merge.py — promote numberOfPosts reliably and normalize to int
-import json, sys, re, hashlib
-from datetime import datetime
+# Candidates are streamed from the JSONL and the archive is copied through verbatim, so a merge costs
+# O(candidates) work on top of one scan of data.json.
+import json, sys, re, os, hashlib, pathlib
+from bisect import bisect_left, bisect_right
+from datetime import date
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools import dates
 
 def norm_spaces(s): return re.sub(r"\s+"," ", (s or "").strip())
 
@@ -16,27 +21,18 @@ def fuzzy_title(s):
 
 def norm_date(s):
     s = (s or "").strip()
-    for fmt in ("%d/%m/%Y","%d-%m-%Y","%Y-%m-%d"):
-        try:
-            return datetime.strptime(s, fmt).strftime("%d/%m/%Y")
-        except Exception:
-            pass
-    return s if s else "N/A"
+    return dates.normalize(s) or s or "N/A"
+
+def canonical_url(u):
+    u = re.sub(r"[?#].*$", "", (u or "").strip().lower())
+    u = re.sub(r"^https?://(www\.)?", "", u)
+    return u.rstrip("/")
 
 def make_key(item):
+    # identity only: the deadline is an attribute that corrigenda and validate() change, not part of the key
     title = fuzzy_title(item.get("title",""))
-    link  = (item.get("detailLink") or item.get("applyLink") or "").lower()
-    link  = re.sub(r"[?#].*$", "", link)
-    date  = norm_date(item.get("deadline","")).lower()
-    raw = f"{title}|{link}|{date}"
-    return hashlib.sha1(raw.encode()).hexdigest()[:16]
-
-def compute_days_left(deadline_ddmmyyyy):
-    try:
-        d = datetime.strptime(deadline_ddmmyyyy, "%d/%m/%Y")
-        return max((d.date() - datetime.utcnow().date()).days, 0)
-    except Exception:
-        return None
+    link  = canonical_url(item.get("detailLink") or item.get("applyLink"))
+    return hashlib.sha1(f"{title}|{link}".encode()).hexdigest()[:16]
 
 POSTS_PAT = re.compile(r"(\d{1,6})\s*(posts?|vacanc(?:y|ies)|seats?)", re.I)
 def posts_from_text(txt):
@@ -68,50 +64,165 @@ def validate(i):
     }
     p = to_int(i.get("numberOfPosts")) or posts_from_text(out["title"])
     if p: out["numberOfPosts"]=p
-    dl = compute_days_left(out["deadline"])
-    if dl is not None: out["daysLeft"] = dl
     return out
 
-def merge(existing, candidates):
-    idx = { make_key(x): x for x in existing }
-    added = 0
+def set_days_left(items, today=None):
+    """daysLeft (clamped at 0) for every listing a merge touched, in one batch against one day."""
+    for it, dl in zip(items, dates.days_left_all([it.get("deadline") for it in items], today or date.today(), floor=0)):
+        if dl is not None: it["daysLeft"] = dl
+
+def _deadline_rank(dd):
+    d = dates.parse(dd)
+    return (0, d) if d else (1, date.max)
+
+def sort_key(it):
+    return _deadline_rank(it.get("deadline","N/A")) + (it.get("title",""),)
+
+def later_deadline(a, b):
+    if _deadline_rank(a)[0]: return b
+    if _deadline_rank(b)[0]: return a
+    return max(a, b, key=_deadline_rank)
+
+def upsert(ex, v):
+    """Fold listing `v` into `ex` (same key): fill missing fields, keep the later deadline (extensions)."""
+    for f in ["qualificationLevel","domicile","applyLink","detailLink","source","type"]:
+        if v.get(f) and (not ex.get(f) or ex.get(f)=="N/A"):
+            ex[f] = v[f]
+    ex["deadline"] = later_deadline(ex.get("deadline") or "N/A", v.get("deadline") or "N/A")
+    if v.get("numberOfPosts") and not ex.get("numberOfPosts"):
+        ex["numberOfPosts"]=v["numberOfPosts"]
+    ex["flags"] = { **(ex.get("flags") or {}), **(v.get("flags") or {}) }
+
+def merge(existing, candidates, stats=None):
+    """Upsert `candidates` (any iterable, consumed lazily) into `existing`, which is kept in deadline order.
+    `existing` is only sorted when it is out of order (a previous merge leaves it sorted); new and re-dated
+    listings are placed by bisection instead of re-sorting the whole list. Counts go into `stats`."""
+    keys = [sort_key(x) for x in existing]
+    if any(keys[i]>keys[i+1] for i in range(len(keys)-1)):
+        order = sorted(range(len(existing)), key=keys.__getitem__)
+        existing[:] = [existing[i] for i in order]; keys = [keys[i] for i in order]
+    idx = {}
+    for x in existing: idx.setdefault(make_key(x), x)
+    added = updated = 0; touched = []
     for raw in candidates:
         v = validate(raw)
         k = make_key(v)
         if k in idx:
-            ex = idx[k]
-            for f in ["qualificationLevel","domicile","deadline","applyLink","detailLink","source","type"]:
-                if v.get(f) and (not ex.get(f) or ex.get(f)=="N/A"):
-                    ex[f] = v[f]
-            if v.get("numberOfPosts") and not ex.get("numberOfPosts"):
-                ex["numberOfPosts"]=v["numberOfPosts"]
-            ex["flags"] = { **(ex.get("flags") or {}), **(v.get("flags") or {}) }
-            if v.get("daysLeft") is not None: ex["daysLeft"] = v["daysLeft"]
+            ex = idx[k]; before = sort_key(ex)
+            upsert(ex, v); updated += 1; touched.append(ex)
+            after = sort_key(ex)
+            if after!=before:
+                p = bisect_left(keys, before)
+                while existing[p] is not ex: p += 1
+                del existing[p], keys[p]
+                p = bisect_right(keys, after); existing.insert(p, ex); keys.insert(p, after)
         else:
-            existing.append(v); idx[k]=v; added += 1
-    def sort_key(it):
-        dd = it.get("deadline","N/A")
-        try:
-            dt = datetime.strptime(dd,"%d/%m/%Y")
-            return (0, dt, it.get("title",""))
-        except Exception:
-            return (1, datetime.max, it.get("title",""))
-    existing.sort(key=sort_key)
+            kv = sort_key(v); p = bisect_right(keys, kv)
+            existing.insert(p, v); keys.insert(p, kv); idx[k]=v; added += 1; touched.append(v)
+    set_days_left(touched)
+    if stats is not None:
+        n = added+updated
+        stats.update({"added":added, "updated":updated, "candidates":n, "hitRate":round(updated/n, 4) if n else None})
     return existing, added
 
+def compact(existing):
+    """Fold listings that share a key (duplicates left by the deadline-bearing key) into the first one."""
+    idx = {}; out = []; touched = []
+    for x in existing:
+        k = make_key(x)
+        if k in idx: upsert(idx[k], x); touched.append(idx[k])
+        else: idx[k] = x; out.append(x)
+    set_days_left(touched)
+    out.sort(key=sort_key)
+    return out, len(existing)-len(out)
+
+def iter_jsonl(path):
+    with open(path,"r",encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try: yield json.loads(line)
+            except ValueError: continue
+
+class Raw(str):
+    """A JSON value kept as its source text."""
+
+_DEC = json.JSONDecoder()
+_WS = re.compile(r"\s*")
+# everything up to the next structural bracket outside a string, in one match; the groups are possessive
+# so an unterminated string or value fails in linear time instead of backtracking
+_TOK = re.compile(r'(?:[^"\[\]{}]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+([\[\]{}])')
+
+def _skip(text, i):
+    # offset just past the JSON value starting at text[i], found without building it
+    if text[i] not in "[{": return _DEC.raw_decode(text, i)[1]
+    depth = 0
+    # tokens are matched back to back: a gap would mean a quote or bracket the pattern could not consume
+    while (m := _TOK.match(text, i)):
+        i = m.end()
+        if m.group(1) in "[{": depth += 1
+        else:
+            depth -= 1
+            if not depth: return i
+    raise ValueError(f"unterminated JSON value at offset {i}")
+
+def read_doc(path, parse=("jobListings","transparencyInfo")):
+    """Top-level members of the JSON object in `path`. Keys in `parse` are decoded; the rest (archive,
+    sections, ...) stay Raw and are written back verbatim. The whole file is read and each Raw member is
+    a copy of its slice, so memory still peaks at about twice the file size and grows with the archive."""
+    text = open(path,"r",encoding="utf-8").read()
+    i = _WS.match(text).end()
+    if text[i:i+1]!="{": raise ValueError(f"{path}: not a JSON object")
+    doc = {}; i = _WS.match(text, i+1).end()
+    while text[i]!="}":
+        key, i = _DEC.raw_decode(text, i)
+        i = _WS.match(text, _WS.match(text, i).end()+1).end()
+        if key in parse: doc[key], end = _DEC.raw_decode(text, i)
+        else: end = _skip(text, i); doc[key] = Raw(text[i:end])
+        i = _WS.match(text, end).end()
+        if text[i]==",": i = _WS.match(text, i+1).end()
+    return doc
+
+def write_doc(path, doc):
+    """Stream `doc` to `path` (atomically): lists item by item, Raw members copied as-is."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp,"w",encoding="utf-8") as f:
+        f.write("{")
+        for n,(k,v) in enumerate(doc.items()):
+            f.write(("," if n else "")+"\n"+json.dumps(k)+":")
+            if isinstance(v, Raw): f.write(v)
+            elif isinstance(v, list):
+                f.write("[")
+                for m,it in enumerate(v): f.write(("," if m else "")+"\n"+json.dumps(it, ensure_ascii=False))
+                f.write("]")
+            else: json.dump(v, f, ensure_ascii=False)
+        f.write("\n}\n")
+    os.replace(tmp, path)
+
 if __name__ == "__main__":
+    from tools.perf import stage
+    stage("merge")
+    if len(sys.argv)==4 and sys.argv[1]=="--compact":
+        data = read_doc(sys.argv[2])
+        data["jobListings"], folded = compact(data.get("jobListings") or [])
+        data["transparencyInfo"] = data.get("transparencyInfo") or {}
+        data["transparencyInfo"]["totalListings"] = len(data["jobListings"])
+        write_doc(sys.argv[3], data)
+        print(json.dumps({"folded":folded, "listings":len(data["jobListings"])}))
+        sys.exit(0)
     if len(sys.argv) != 4:
         print("Usage: python tools/schema_merge.py data.json tmp/candidates.jsonl data.json")
+        print("       python tools/schema_merge.py --compact data.json data.json")
         sys.exit(2)
     data_path, cand_path, out_path = sys.argv[1], sys.argv[2], sys.argv[3]
-    data = json.load(open(data_path,"r",encoding="utf-8"))
+    data = read_doc(data_path)
     existing = data.get("jobListings") or []
-    cands = [json.loads(line) for line in open(cand_path,"r",encoding="utf-8") if line.strip()]
-    merged, added = merge(existing, cands)
+    stats = {}
+    merged, added = merge(existing, iter_jsonl(cand_path), stats)
     data["jobListings"] = merged
-    data.setdefault("archivedListings", data.get("archivedListings") or [])
-    data.setdefault("sections", data.get("sections") or {"applied":[],"other":[],"primary":[]})
-    data.setdefault("transparencyInfo", {})
+    data.setdefault("archivedListings", [])
+    data.setdefault("sections", {"applied":[],"other":[],"primary":[]})
+    data["transparencyInfo"] = data.get("transparencyInfo") or {}
     data["transparencyInfo"]["totalListings"] = len(merged)
-    json.dump(data, open(out_path,"w",encoding="utf-8"), indent=2, ensure_ascii=False)
-    print(json.dumps({"added":added}))
+    write_doc(out_path, data)
+    print(json.dumps(stats))
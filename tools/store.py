@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# store.py — SQLite store behind data.json: listings, archive and change history
+#   python tools/store.py import [data.json]        # (re)build the store from a data.json
+#   python tools/store.py export [out.json]         # write data.json as a view of the store
+#   python tools/store.py query [--host H] [--url U] [--status active|archived|removed] [--before YYYY-MM-DD] [--after YYYY-MM-DD] [--limit N]
+#   python tools/store.py history ID                # every recorded version of one listing
+#   python tools/store.py stats
+# pipeline.py keeps the archive here instead of reloading and rewriting it inside data.json: a run reads the
+# active listings, checks "still archived" by primary key and appends only what it archived this run.
+# data.json stays the published view; whenever its bytes differ from what the store last imported or
+# exported (or the store is missing) the store is rebuilt from it, so the file can be rewritten by other
+# tools, and the store dropped or lost between runs, without losing data.
+# Publishing still writes the whole archive into data.json every run (and into the archive shard when it
+# changed), so that cost stays linear in the archive; export() hands it over as the stored JSON text, which
+# saves decoding and re-encoding every archived listing.
+import os, sys, json, sqlite3, hashlib, pathlib
+from datetime import datetime
+from urllib.parse import urlparse
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from tools.schema_merge import make_key, canonical_url, Raw
+from tools.publish import dumps_min, write_atomic
+from tools import dates
+
+STORE_PATH = os.getenv("STORE_PATH", "listings.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings(
+  id TEXT PRIMARY KEY, mkey TEXT, curl TEXT, host TEXT, deadline TEXT,
+  status TEXT NOT NULL, pos INTEGER, hash TEXT, body TEXT NOT NULL,
+  first_seen TEXT, updated_at TEXT, archived_at TEXT);
+CREATE INDEX IF NOT EXISTS listings_key ON listings(mkey);
+CREATE INDEX IF NOT EXISTS listings_url ON listings(curl);
+CREATE INDEX IF NOT EXISTS listings_host ON listings(host, status);
+CREATE INDEX IF NOT EXISTS listings_deadline ON listings(status, deadline);
+CREATE INDEX IF NOT EXISTS listings_order ON listings(status, pos);
+CREATE TABLE IF NOT EXISTS history(listing_id TEXT, run TEXT, at TEXT, event TEXT, body TEXT);
+CREATE INDEX IF NOT EXISTS history_listing ON history(listing_id);
+CREATE TABLE IF NOT EXISTS runs(run TEXT, at TEXT, mode TEXT, active INTEGER, archived INTEGER, info TEXT);
+CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY, v TEXT);
+"""
+
+UPSERT = """INSERT INTO listings(id,mkey,curl,host,deadline,status,pos,hash,body,first_seen,updated_at,archived_at)
+VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
+ON CONFLICT(id) DO UPDATE SET mkey=excluded.mkey, curl=excluded.curl, host=excluded.host, deadline=excluded.deadline,
+  status=excluded.status, pos=excluded.pos, body=excluded.body, archived_at=excluded.archived_at,
+  updated_at=CASE WHEN listings.hash IS excluded.hash THEN listings.updated_at ELSE excluded.updated_at END,
+  hash=excluded.hash"""
+
+# rewritten on every run without the listing itself changing; left out of the change hash
+VOLATILE = ("extractedAt","daysLeft")
+
+def dumps(j): return json.dumps(j, ensure_ascii=False, separators=(",",":"))
+def digest(j): return hashlib.sha1(dumps({k:v for k,v in j.items() if k not in VOLATILE}).encode("utf-8")).hexdigest()[:16]
+def now_iso(): return datetime.utcnow().isoformat()+"Z"
+
+def file_digest(path):
+    """sha1 of a file's bytes (streamed); None when it cannot be read."""
+    h = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1<<20), b""): h.update(chunk)
+    except OSError: return None
+    return h.hexdigest()
+
+def iso_date(s):
+    """Deadline -> YYYY-MM-DD for the deadline index; None when unparseable."""
+    d = dates.parse(s)
+    return d.isoformat() if d else None
+
+def row(j, status, pos, ts, archived_at=None):
+    body = dumps(j)
+    link = j.get("detailLink") or j.get("applyLink")
+    return (j["id"], make_key(j), canonical_url(link), urlparse(link or "").netloc.lower(), iso_date(j.get("deadline")),
+            status, pos, digest(j), body, ts, ts, archived_at)
+
+class ArchivedIds:
+    """`jid in store.archived_ids` as a primary-key lookup; stands in for the set of archived ids."""
+    def __init__(self, db): self.db = db
+    def __contains__(self, jid):
+        return self.db.execute("SELECT 1 FROM listings WHERE id=? AND status='archived'", (jid,)).fetchone() is not None
+
+class Store:
+    def __init__(self, path=STORE_PATH):
+        self.path = str(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL"); self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.archived_ids = ArchivedIds(self.db)
+
+    def close(self): self.db.close()
+    def __enter__(self): return self
+    def __exit__(self, *a): self.close()
+
+    def get_meta(self, k, default=None):
+        r = self.db.execute("SELECT v FROM meta WHERE k=?", (k,)).fetchone()
+        return json.loads(r[0]) if r else default
+
+    def set_meta(self, k, v):
+        self.db.execute("INSERT OR REPLACE INTO meta(k,v) VALUES(?,?)", (k, json.dumps(v, ensure_ascii=False)))
+
+    def count(self, status):
+        return self.db.execute("SELECT COUNT(*) FROM listings WHERE status=?", (status,)).fetchone()[0]
+
+    # ---------------- data.json <-> store ----------------
+    def import_doc(self, doc):
+        """Replace listings with the contents of a data.json document (history is kept)."""
+        ts = now_iso()
+        with self.db:
+            self.db.execute("DELETE FROM listings")
+            self.db.executemany(UPSERT, (row(j, "active", i, ts) for i,j in enumerate(doc.get("jobListings") or []) if j.get("id")))
+            self.db.executemany(UPSERT, (row(j, "archived", i, ts, ts) for i,j in enumerate(doc.get("archivedListings") or []) if j.get("id")))
+            self.save_doc_meta(doc)
+
+    def save_doc_meta(self, doc):
+        info = doc.get("transparencyInfo") or {}
+        self.set_meta("transparencyInfo", info); self.set_meta("sections", doc.get("sections"))
+
+    def stamp(self, path="data.json"):
+        """Record `path` (just imported or exported) as matching the store, by content digest."""
+        with self.db: self.set_meta("docStamp", file_digest(path))
+
+    def sync(self, path="data.json"):
+        """Rebuild from `path` unless its bytes are exactly what this store last imported or exported, so any
+        rewrite of the file (schema_merge --compact, a manual edit, a lost store) wins. Returns True when an
+        import happened."""
+        d = file_digest(path)
+        if d is None: return False
+        if self.count("active")+self.count("archived") and d==self.get_meta("docStamp"): return False
+        self.import_doc(json.load(open(path,"r",encoding="utf-8")))
+        self.stamp(path)
+        return True
+
+    def active(self):
+        return [json.loads(b) for (b,) in self.db.execute("SELECT body FROM listings WHERE status='active' ORDER BY pos")]
+
+    def previous(self):
+        """The last published document without its archive, for scraper.apply_delta."""
+        return {"jobListings": self.active(), "archivedListings": [], "archivedIds": self.archived_ids,
+                "transparencyInfo": self.get_meta("transparencyInfo", {})}
+
+    def archived_json(self):
+        """The archive as one JSON array, joined from the stored (already minified) bodies without decoding."""
+        return Raw("["+",".join(b for (b,) in self.db.execute("SELECT body FROM listings WHERE status='archived' ORDER BY pos"))+"]")
+
+    def export(self, data):
+        """`data` with archivedListings replaced by the full archive, i.e. the data.json view. The archive
+        is Raw JSON text, written verbatim by tools/publish.py."""
+        return {**data, "archivedListings": self.archived_json()}
+
+    # ---------------- one pipeline run ----------------
+    def commit(self, data, run="", mode=""):
+        """Persist a run in one transaction: data["jobListings"] becomes the active set and
+        data["archivedListings"] (only what this run archived) is appended to the archive. Every added,
+        changed, archived or dropped listing gets a history row."""
+        ts = now_iso(); events = []
+        active = [j for j in data.get("jobListings") or [] if j.get("id")]
+        new_arch = [j for j in data.get("archivedListings") or [] if j.get("id")]
+        with self.db:
+            old = dict(self.db.execute("SELECT id, hash FROM listings WHERE status='active'"))
+            rows = []
+            for i,j in enumerate(active):
+                r = row(j, "active", i, ts); rows.append(r)
+                h = old.pop(j["id"], None)
+                if h is None: events.append((j["id"], run, ts, "added", r[8]))
+                elif h!=r[7]: events.append((j["id"], run, ts, "changed", r[8]))
+            self.db.executemany(UPSERT, rows)
+            nxt = self.db.execute("SELECT COALESCE(MAX(pos),-1)+1 FROM listings WHERE status='archived'").fetchone()[0]
+            rows = []
+            for j in new_arch:
+                known = self.db.execute("SELECT pos FROM listings WHERE id=? AND status='archived'", (j["id"],)).fetchone()
+                if known: pos = known[0]
+                else: pos = nxt; nxt += 1
+                r = row(j, "archived", pos, ts, ts); rows.append(r)
+                old.pop(j["id"], None)
+                events.append((j["id"], run, ts, "archived", r[8]))
+            self.db.executemany(UPSERT, rows)
+            # active last run, neither active nor archived now: dropped by the scrape delta
+            self.db.executemany("UPDATE listings SET status='removed', pos=NULL, updated_at=? WHERE id=?", ((ts, k) for k in old))
+            events += [(k, run, ts, "removed", None) for k in old]
+            self.db.executemany("INSERT INTO history VALUES(?,?,?,?,?)", events)
+            self.save_doc_meta(data)
+            # data.json no longer matches until the caller publishes this run and stamps it
+            self.set_meta("docStamp", None)
+            self.db.execute("INSERT INTO runs VALUES(?,?,?,?,?,?)", (run, ts, mode, len(active), self.count("archived"),
+                            dumps({"events": len(events), "archivedNow": len(new_arch)})))
+        return {"added": sum(e[3]=="added" for e in events), "changed": sum(e[3]=="changed" for e in events),
+                "archived": len(new_arch), "removed": len(old)}
+
+    # ---------------- queries ----------------
+    def query(self, host=None, url=None, status=None, before=None, after=None, limit=100):
+        where, args = [], []
+        if host: where.append("host=?"); args.append(host.lower())
+        if url: where.append("curl=?"); args.append(canonical_url(url))
+        if status: where.append("status=?"); args.append(status)
+        if before: where.append("deadline<?"); args.append(before)
+        if after: where.append("deadline>=?"); args.append(after)
+        q = ("SELECT status, deadline, body FROM listings" + (" WHERE "+" AND ".join(where) if where else "")
+             + " ORDER BY deadline LIMIT ?")
+        return [(s, d, json.loads(b)) for s,d,b in self.db.execute(q, args+[limit])]
+
+    def history(self, jid):
+        return [(run, at, ev, json.loads(b) if b else None)
+                for run,at,ev,b in self.db.execute("SELECT run, at, event, body FROM history WHERE listing_id=? ORDER BY rowid", (jid,))]
+
+if __name__ == "__main__":
+    a = sys.argv[1:]
+    def opt(name, default=None): return a[a.index(name)+1] if name in a else default
+    if not a or a[0] not in ("import","export","query","history","stats"):
+        print("Usage: python tools/store.py import [data.json] | export [out.json] | query [--host H] [--url U] [--status S] "
+              "[--before YYYY-MM-DD] [--after YYYY-MM-DD] [--limit N] | history ID | stats")
+        sys.exit(2)
+    with Store() as st:
+        if a[0]=="import":
+            src = a[1] if len(a)>1 else "data.json"
+            st.import_doc(json.load(open(src,"r",encoding="utf-8"))); st.stamp(src)
+            print(json.dumps({"active": st.count("active"), "archived": st.count("archived")}))
+        elif a[0]=="export":
+            out = a[1] if len(a)>1 else "data.json"
+            doc = {"jobListings": st.active(), "archivedListings": None, "sections": st.get_meta("sections") or {"applied":[],"other":[],"primary":[]},
+                   "transparencyInfo": st.get_meta("transparencyInfo", {})}
+            write_atomic(pathlib.Path(out), dumps_min(st.export(doc))); st.stamp(out)
+        elif a[0]=="query":
+            for s,d,j in st.query(opt("--host"), opt("--url"), opt("--status"), opt("--before"), opt("--after"), int(opt("--limit", 100))):
+                print(f"{s:<9}{d or '-':<12}{j.get('id','')[:24]:<26}{j.get('title','')[:90]}")
+        elif a[0]=="history":
+            for run,at,ev,j in st.history(a[1]):
+                print(f"{at}  {run or '-':<20}{ev:<9}{(j or {}).get('deadline','')}")
+        else:
+            print(json.dumps({s: st.count(s) for s in ("active","archived","removed")} | {
+                "history": st.db.execute("SELECT COUNT(*) FROM history").fetchone()[0],
+                "runs": st.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]}))